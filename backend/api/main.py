@@ -1,12 +1,29 @@
-from fastapi import FastAPI, UploadFile, File, Depends, HTTPException, BackgroundTasks, Response
+from fastapi import FastAPI, UploadFile, File, Depends, HTTPException, BackgroundTasks, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from starlette.formparsers import MultiPartParser
+from sqlalchemy import select, update, delete, func, cast, Text, literal_column, bindparam
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from sqlalchemy.orm import Session
+from sqlalchemy.pool import QueuePool
+import io
 import os
-import uuid
+import hashlib
+import json
+import time
+import asyncio
 import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from typing import List, Optional
-import shutil
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+import aiofiles
+import orjson
+from cachetools import TTLCache
 from dotenv import load_dotenv
 
 import sys
@@ -19,7 +36,7 @@ load_dotenv()
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
-from backend.database.models import get_db, create_tables, Video, TranscriptChunk, VideoFrame
+from backend.database.models import SessionLocal, get_request_db, create_tables, engine, Video, TranscriptChunk, VideoFrame
 from backend.video_processor.processor import VideoProcessor, is_supported_format
 from backend.transcript_handler.handler import TranscriptHandler
 
@@ -30,30 +47,192 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title="MultiModel Video Processor API",
     description="API for processing videos with AI-powered analysis, embeddings, and RAG - Phase 2",
-    version="2.0.0"
+    version="2.0.0",
+    default_response_class=ORJSONResponse
 )
 
-# CORS middleware
+# OpenAI API key for the RAG system, read once at import
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+
+# CORS middleware. CORS_ORIGINS takes a comma-separated list of origins; an
+# explicit list lets the middleware match origins directly instead of
+# echoing every request's origin back as it does for the "*" wildcard
+CORS_ORIGINS = [origin.strip() for origin in os.getenv("CORS_ORIGINS", "*").split(",") if origin.strip()]
+
+# Explicit method/header lists are checked directly rather than mirrored from
+# each preflight, and max_age lets browsers reuse a preflight result
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # Configure appropriately for production
+    allow_origins=CORS_ORIGINS,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "DELETE"],
+    allow_headers=["Authorization", "Content-Type", "If-None-Match"],
+    expose_headers=["ETag"],
+    max_age=int(os.getenv("CORS_MAX_AGE", "86400")),
 )
 
 # Initialize processors
 video_processor = VideoProcessor()
 transcript_handler = TranscriptHandler()
 
-# Create database tables on startup
+# Transcription (Whisper, YouTube downloads) and frame extraction are long and
+# blocking. They get their own small pool so they never run on the event loop
+# and never crowd out request handlers in the default threadpool; one worker
+# per GPU keeps Whisper from oversubscribing the device
+media_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("MEDIA_WORKERS", "1")),
+    thread_name_prefix="media"
+)
+
+async def _run_media_task(func, *args):
+    """Run a blocking transcription/extraction call on the media pool"""
+    return await asyncio.get_running_loop().run_in_executor(media_executor, func, *args)
+
+# Frame decoding and JPEG encoding are CPU-bound and hold the GIL, so they run
+# in worker processes; frames of several videos are then extracted in parallel.
+# Workers are spawned rather than forked so they don't inherit model/CUDA state
+def _new_frame_pool() -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(
+        max_workers=int(os.getenv("FRAME_WORKERS", str(os.cpu_count() or 1))),
+        mp_context=multiprocessing.get_context("spawn")
+    )
+
+frame_pool = _new_frame_pool()
+_frame_pool_lock = threading.Lock()
+
+def _replace_broken_frame_pool(broken: ProcessPoolExecutor):
+    """Swap in a fresh frame pool after a worker died, unless another caller already did"""
+    global frame_pool
+    with _frame_pool_lock:
+        if frame_pool is broken:
+            frame_pool = _new_frame_pool()
+            broken.shutdown(wait=False, cancel_futures=True)
+
+async def _extract_frames(video_path: str, video_id: int, fps: float = 1.0) -> List[Tuple]:
+    """Extract a video's frames on the frame process pool"""
+    loop = asyncio.get_running_loop()
+    pool = frame_pool
+    try:
+        return await loop.run_in_executor(pool, video_processor.extract_frames, video_path, video_id, fps)
+    except BrokenProcessPool:
+        # A crashed worker (OOM, a native crash in OpenCV) breaks the whole pool;
+        # replace it so later videos still work and retry this one once
+        logger.warning(f"Frame pool broken while extracting video {video_id}; restarting it")
+        _replace_broken_frame_pool(pool)
+        return await loop.run_in_executor(frame_pool, video_processor.extract_frames, video_path, video_id, fps)
+
+# Object detection, visual search and transcript analysis are synchronous
+# CPU-bound engine calls; they get a pool sized to the CPU count so they
+# neither block the event loop nor crowd out request handlers
+inference_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("INFERENCE_WORKERS", str(os.cpu_count() or 1))),
+    thread_name_prefix="inference"
+)
+
+async def _run_inference(func, *args):
+    """Run a blocking vision/NLP engine call on the inference pool"""
+    return await asyncio.get_running_loop().run_in_executor(inference_executor, func, *args)
+
+# Uploads are streamed to disk in fixed-size chunks
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Uploads up to this size are spooled in memory by the multipart parser
+UPLOAD_SPOOL_MAX_SIZE = getattr(MultiPartParser, "max_file_size", 1024 * 1024)
+
+def _upload_fileno(upload: UploadFile) -> Optional[int]:
+    """Return the descriptor of a disk-backed upload, or None if it may still be in memory"""
+    if not sys.platform.startswith("linux"):
+        return None
+    if upload.size is None or upload.size <= UPLOAD_SPOOL_MAX_SIZE:
+        # fileno() would force an in-memory upload onto disk first
+        return None
+    try:
+        return upload.file.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return None
+
+def _sendfile_upload(src_fd: int, dest: Path):
+    """Copy a disk-backed upload to dest inside the kernel"""
+    size = os.fstat(src_fd).st_size
+    with open(dest, "wb") as buffer:
+        offset = 0
+        while offset < size:
+            sent = os.sendfile(buffer.fileno(), src_fd, offset, size - offset)
+            if sent == 0:
+                break
+            offset += sent
+
+async def _save_upload(upload: UploadFile, dest: Path):
+    """Stream an uploaded file to disk without blocking the event loop"""
+    src_fd = _upload_fileno(upload)
+    if src_fd is not None:
+        await asyncio.to_thread(_sendfile_upload, src_fd, dest)
+        return
+    
+    async with aiofiles.open(dest, "wb") as buffer:
+        while chunk := await upload.read(UPLOAD_CHUNK_SIZE):
+            await buffer.write(chunk)
+
+# YouTube video ID -> (database ID, start time) of the upload currently
+# processing it. Only touched from the event loop, so no lock is needed
+_youtube_inflight: Dict[str, Tuple[int, float]] = {}
+# An entry older than this is assumed to belong to a task that never finished
+YOUTUBE_INFLIGHT_TIMEOUT = int(os.getenv("YOUTUBE_INFLIGHT_TIMEOUT", "3600"))
+
+# Processing status is polled heavily; cache it briefly and drop the entry
+# whenever a background task updates the video. Status endpoints run in the
+# threadpool, so access goes through a lock
+_status_cache = TTLCache(maxsize=4096, ttl=30)
+_status_cache_lock = threading.Lock()
+# Bumped on every invalidation so a read that overlaps one can't cache stale data
+_status_generations: Dict[int, int] = {}
+
+def _get_cached_status(video_id: int) -> Optional[dict]:
+    """Return the cached processing status of a video, if any"""
+    with _status_cache_lock:
+        return _status_cache.get(video_id)
+
+def _status_generation(video_id: int) -> int:
+    """Current invalidation generation of a video's status; read before loading it"""
+    with _status_cache_lock:
+        return _status_generations.get(video_id, 0)
+
+def _invalidate_cached_status(video_id: int):
+    """Drop a video's cached processing status after it changes"""
+    with _status_cache_lock:
+        _status_generations[video_id] = _status_generations.get(video_id, 0) + 1
+        _status_cache.pop(video_id, None)
+
+# Create database tables and initialize Phase 3-5 components concurrently on startup
 @app.on_event("startup")
 async def startup_event():
-    create_tables()
-    logger.info("Database tables created")
+    async def create_tables_async():
+        # Multi-worker deployments set RUN_MIGRATIONS=0 and create the schema
+        # once with `python -m backend.database.models` instead of having
+        # every worker issue the DDL checks on boot
+        if os.getenv("RUN_MIGRATIONS", "1") != "1":
+            return
+        await asyncio.to_thread(create_tables)
+        logger.info("Database tables created")
+    
+    async def warm_embedding_engine():
+        # Load the embedding models and search indexes now so the first
+        # embedding task or search doesn't pay for it
+        if not PHASE2_AVAILABLE:
+            return
+        try:
+            engine = await get_embedding_engine()
+            await engine.preload_indexes()
+        except Exception as e:
+            logger.error(f"Failed to pre-load embedding engine: {e}")
+    
+    await asyncio.gather(create_tables_async(), warm_embedding_engine(), initialize_phase3_to_5())
+    
+    # Build the OpenAPI schema now; FastAPI memoizes it on the app, so the
+    # first /docs or /openapi.json request doesn't pay for reflecting every model
+    app.openapi()
 
 # Pydantic models for API
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 class VideoUploadResponse(BaseModel):
     video_id: int
@@ -68,6 +247,9 @@ class VideoProcessingStatus(BaseModel):
     frames_extracted: bool
     status: str
 
+class BatchVideoStatusRequest(BaseModel):
+    video_ids: List[int]
+
 class YouTubeProcessRequest(BaseModel):
     url: str
     use_whisper: bool = False
@@ -91,7 +273,9 @@ class YouTubeVideoInfo(BaseModel):
     url: str
 
 class EmbeddingRequest(BaseModel):
-    video_id: int
+    # Either one video or several
+    video_id: Optional[int] = None
+    video_ids: List[int] = []
     chunk_size: int = 1000
     overlap: int = 200
 
@@ -111,11 +295,13 @@ class SearchResult(BaseModel):
 class SearchRequest(BaseModel):
     query: str
     video_id: Optional[int] = None
-    top_k: int = 5
+    top_k: int = Field(5, ge=1, le=50)
 
 class RAGRequest(BaseModel):
     query: str
-    video_id: int
+    # One video, several, or neither to search every video
+    video_id: Optional[int] = None
+    video_ids: List[int] = []
     include_visual: bool = False
 
 class ChatSessionCreate(BaseModel):
@@ -173,6 +359,7 @@ class ContentOutlineResponse(BaseModel):
 try:
     from backend.embedding_engine.engine import get_embedding_engine
     from backend.embedding_engine.rag import get_rag_system
+    from backend.embedding_engine.semantic_cache import SemanticCache
     PHASE2_AVAILABLE = True
 except ImportError:
     PHASE2_AVAILABLE = False
@@ -197,7 +384,6 @@ conversation_manager = None
 visual_search_engine = None
 content_segmentation_engine = None
 
-@app.on_event("startup")
 async def initialize_phase3_to_5():
     """Initialize Phase 3-5 components"""
     global conversation_manager, visual_search_engine, content_segmentation_engine
@@ -205,8 +391,7 @@ async def initialize_phase3_to_5():
     if PHASE3_TO_5_AVAILABLE:
         try:
             # Initialize RAG system
-            openai_api_key = os.getenv("OPENAI_API_KEY")
-            rag_system = await get_rag_system(openai_api_key)
+            rag_system = await get_rag_system(OPENAI_API_KEY)
             
             # Initialize components
             conversation_manager = ConversationManager(rag_system)
@@ -219,7 +404,7 @@ async def initialize_phase3_to_5():
 
 # Chat Session Endpoints
 @app.post("/api/v1/chat/sessions")
-async def create_chat_session(video_id: int, title: Optional[str] = None, db: Session = Depends(get_db)):
+async def create_chat_session(video_id: int, title: Optional[str] = None, db: Session = Depends(get_request_db)):
     """Create a new chat session for a video"""
     if not PHASE3_TO_5_AVAILABLE or not conversation_manager:
         raise HTTPException(status_code=501, detail="Chat features not available")
@@ -237,7 +422,7 @@ async def create_chat_session(video_id: int, title: Optional[str] = None, db: Se
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/v1/chat/sessions/{session_id}")
-async def get_chat_session(session_id: str, db: Session = Depends(get_db)):
+def get_chat_session(session_id: str, db: Session = Depends(get_request_db)):
     """Get chat session details"""
     if not PHASE3_TO_5_AVAILABLE or not conversation_manager:
         raise HTTPException(status_code=501, detail="Chat features not available")
@@ -261,26 +446,28 @@ async def get_chat_session(session_id: str, db: Session = Depends(get_db)):
 
 # Visual Search Endpoints
 @app.post("/api/v1/visual-search/detect-objects")
-async def detect_objects_endpoint(video_id: int, frame_path: str, confidence_threshold: float = 0.5, db: Session = Depends(get_db)):
+async def detect_objects_endpoint(video_id: int, frame_path: str, confidence_threshold: float = 0.5, db: Session = Depends(get_request_db)):
     """Detect objects in a video frame"""
     if not PHASE3_TO_5_AVAILABLE or not visual_search_engine:
         raise HTTPException(status_code=501, detail="Visual search features not available")
     
     try:
-        results = visual_search_engine.detect_objects_in_frame(frame_path, confidence_threshold)
+        results = await _run_inference(
+            visual_search_engine.detect_objects_in_frame, frame_path, confidence_threshold
+        )
         return {"objects": results, "frame_path": frame_path}
     except Exception as e:
         logger.error(f"Error detecting objects: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/v1/visual-search/search/{video_id}")
-async def visual_search_endpoint(video_id: int, request: VisualSearchRequest, db: Session = Depends(get_db)):
+async def visual_search_endpoint(video_id: int, request: VisualSearchRequest, db: Session = Depends(get_request_db)):
     """Search for visual content using natural language"""
     if not PHASE3_TO_5_AVAILABLE or not visual_search_engine:
         raise HTTPException(status_code=501, detail="Visual search features not available")
     
     try:
-        results = visual_search_engine.search_visual_content(db, video_id, request.query)
+        results = await _run_inference(visual_search_engine.search_visual_content, db, video_id, request.query)
         return {"query": request.query, "results": results}
     except Exception as e:
         logger.error(f"Error in visual search: {e}")
@@ -288,40 +475,40 @@ async def visual_search_endpoint(video_id: int, request: VisualSearchRequest, db
 
 # Content Segmentation Endpoints
 @app.post("/api/v1/content/analyze-topics")
-async def analyze_topics_endpoint(video_id: int, db: Session = Depends(get_db)):
+async def analyze_topics_endpoint(video_id: int, db: Session = Depends(get_request_db)):
     """Analyze video transcript to identify topic segments"""
     if not PHASE3_TO_5_AVAILABLE or not content_segmentation_engine:
         raise HTTPException(status_code=501, detail="Content analysis features not available")
     
     try:
-        results = content_segmentation_engine.analyze_transcript_topics(db, video_id)
+        results = await _run_inference(content_segmentation_engine.analyze_transcript_topics, db, video_id)
         return {"video_id": video_id, "topics": results}
     except Exception as e:
         logger.error(f"Error analyzing topics: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/v1/content/generate-outline")
-async def generate_outline_endpoint(video_id: int, db: Session = Depends(get_db)):
+async def generate_outline_endpoint(video_id: int, db: Session = Depends(get_request_db)):
     """Generate content outline for video navigation"""
     if not PHASE3_TO_5_AVAILABLE or not content_segmentation_engine:
         raise HTTPException(status_code=501, detail="Content analysis features not available")
     
     try:
-        outline = content_segmentation_engine.generate_content_outline(db, video_id)
+        outline = await _run_inference(content_segmentation_engine.generate_content_outline, db, video_id)
         return {"video_id": video_id, "outline": outline}
     except Exception as e:
         logger.error(f"Error generating outline: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/v1/content/navigation/{video_id}")
-async def get_navigation_data(video_id: int, db: Session = Depends(get_db)):
+async def get_navigation_data(video_id: int, request: Request, db: Session = Depends(get_request_db)):
     """Get navigation data for video player"""
     if not PHASE3_TO_5_AVAILABLE or not content_segmentation_engine:
         raise HTTPException(status_code=501, detail="Content analysis features not available")
     
     try:
-        nav_data = content_segmentation_engine.get_video_navigation_data(db, video_id)
-        return nav_data
+        nav_data = await _run_inference(content_segmentation_engine.get_video_navigation_data, db, video_id)
+        return _etag_json_response(request, orjson.dumps(jsonable_encoder(nav_data)))
     except Exception as e:
         logger.error(f"Error getting navigation data: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -341,6 +528,34 @@ async def root():
         "version": "3.0.0"
     }
 
+# Load balancers probe /health every second or so; rebuild the body at most once a second
+HEALTH_CACHE_SECONDS = 1.0
+_health_cache = {"expires": 0.0, "body": b""}
+
+@app.get("/health")
+async def health_check():
+    """Report API health and database connection pool usage"""
+    now = time.monotonic()
+    if now >= _health_cache["expires"]:
+        pool = engine.pool
+        database = {"pool": pool.status()}
+        if isinstance(pool, QueuePool):
+            database.update(
+                size=pool.size(),
+                idle=pool.checkedin(),
+                in_use=pool.checkedout(),
+                overflow=pool.overflow()
+            )
+        
+        _health_cache["body"] = orjson.dumps({
+            "status": "healthy",
+            "timestamp": datetime.utcnow(),
+            "database": database
+        })
+        _health_cache["expires"] = now + HEALTH_CACHE_SECONDS
+    
+    return Response(content=_health_cache["body"], media_type="application/json")
+
 @app.get("/favicon.ico")
 async def favicon():
     """Return a simple favicon to prevent 404 errors"""
@@ -350,31 +565,31 @@ async def favicon():
 async def upload_video(
     background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_request_db)
 ):
     """Upload and process a video file"""
+    temp_full_path = None
     try:        # Validate file format
         if not is_supported_format(file.filename):
             supported_formats = ['mp4', 'avi', 'mov', 'mkv', 'webm', 'flv', 'm4v']
             raise HTTPException(status_code=400, detail=f"Unsupported file format. Supported formats: {', '.join(supported_formats)}")
         
-        # Create temporary file
-        temp_file_path = f"temp_{uuid.uuid4()}_{file.filename}"
-        temp_full_path = video_processor.upload_dir / temp_file_path
+        # Stage the upload next to its final location so moving it is a rename
+        temp_full_path = video_processor.staging_path(file.filename)
         
         # Save uploaded file
-        with open(temp_full_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        await _save_upload(file, temp_full_path)
         
-        # Validate video file
-        if not video_processor.validate_video_file(str(temp_full_path)):
-            os.remove(temp_full_path)
+        # Validate video file, probing its metadata in the same pass
+        metadata = await asyncio.to_thread(video_processor.get_validated_metadata, str(temp_full_path))
+        if metadata is None:
             raise HTTPException(status_code=400, detail="Invalid video file")
         
-        # Process video file
-        processed_path, metadata = video_processor.process_uploaded_file(
-            str(temp_full_path), file.filename
+        # Process video file; this moves the temp file into place
+        processed_path, metadata = await asyncio.to_thread(
+            video_processor.process_uploaded_file, str(temp_full_path), file.filename, metadata
         )
+        temp_full_path = None
         
         # Create database record
         db_video = Video(
@@ -395,10 +610,6 @@ async def upload_video(
         # Schedule background processing
         background_tasks.add_task(process_video_background, db_video.id, processed_path)
         
-        # Clean up temp file
-        if os.path.exists(temp_full_path):
-            os.remove(temp_full_path)
-        
         return VideoUploadResponse(
             video_id=db_video.id,
             filename=db_video.filename,
@@ -406,18 +617,21 @@ async def upload_video(
             message="Video uploaded successfully. Processing started in background."
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error uploading video: {str(e)}")
-        # Clean up temp file if it exists
-        if 'temp_full_path' in locals() and os.path.exists(temp_full_path):
-            os.remove(temp_full_path)
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        # Remove the temp file unless it was moved into the upload directory
+        if temp_full_path is not None:
+            temp_full_path.unlink(missing_ok=True)
 
 @app.post("/process-youtube", response_model=VideoUploadResponse)
 async def process_youtube_video(
     background_tasks: BackgroundTasks,
     request: YouTubeProcessRequest,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_request_db)
 ):
     """Process a YouTube video URL"""
     try:
@@ -429,6 +643,22 @@ async def process_youtube_video(
         if not video_id:
             raise HTTPException(status_code=400, detail="Could not extract video ID from URL")
         
+        # Join a request for the same video that is still processing instead of starting another
+        inflight = _youtube_inflight.get(video_id)
+        if inflight is not None:
+            inflight_video_id, started_at = inflight
+            row = db.execute(select(Video.processed).where(Video.id == inflight_video_id)).first()
+            if row is None or row.processed or time.monotonic() - started_at > YOUTUBE_INFLIGHT_TIMEOUT:
+                # The video was deleted or finished, or its task never ran to the end
+                _youtube_inflight.pop(video_id, None)
+            else:
+                return VideoUploadResponse(
+                    video_id=inflight_video_id,
+                    filename=f"youtube_{video_id}",
+                    status="processing",
+                    message="YouTube video is already being processed."
+                )
+        
         # Create database record
         db_video = Video(
             filename=f"youtube_{video_id}",
@@ -445,6 +675,7 @@ async def process_youtube_video(
         db.add(db_video)
         db.commit()
         db.refresh(db_video)
+        _youtube_inflight[video_id] = (db_video.id, time.monotonic())
         
         # Schedule background processing
         background_tasks.add_task(
@@ -466,26 +697,50 @@ async def process_youtube_video(
         logger.error(f"Error processing YouTube video: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+try:
+    from backend.youtube_search.service import YouTubeSearchService
+    YOUTUBE_SEARCH_AVAILABLE = True
+except ImportError as e:
+    logger.warning(f"YouTube search not available: {e}")
+    YOUTUBE_SEARCH_AVAILABLE = False
+
+# Building the API client is costly but the client isn't thread-safe, so each
+# worker thread builds one and reuses it; calls are blocking HTTP requests and
+# run in the threadpool
+_youtube_search_local = threading.local()
+
+def _youtube_search_service() -> "YouTubeSearchService":
+    """The calling thread's YouTube search service"""
+    if not YOUTUBE_SEARCH_AVAILABLE:
+        raise HTTPException(status_code=501, detail="YouTube search not available")
+    service = getattr(_youtube_search_local, "service", None)
+    if service is None:
+        service = _youtube_search_local.service = YouTubeSearchService()
+    return service
+
 @app.post("/api/v1/youtube/search")
 async def search_youtube_videos(request: YouTubeSearchRequest):
     """Search YouTube videos using the YouTube Data API"""
     try:
-        from backend.youtube_search.service import YouTubeSearchService
-        
-        search_service = YouTubeSearchService()
-        results = search_service.search_videos(
-            query=request.query,
-            max_results=request.max_results,
-            duration=request.duration,
-            order=request.order
+        results = await asyncio.to_thread(
+            lambda: _youtube_search_service().search_videos(
+                query=request.query,
+                max_results=request.max_results,
+                duration=request.duration,
+                order=request.order
+            )
         )
         
+        # The service already returns dicts in YouTubeVideoInfo's shape, so
+        # pass them through rather than re-validating each one
         return {
             "query": request.query,
             "total_results": len(results),
-            "videos": [YouTubeVideoInfo(**video) for video in results]
+            "videos": results
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error searching YouTube videos: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -494,10 +749,7 @@ async def search_youtube_videos(request: YouTubeSearchRequest):
 async def get_youtube_video_info(url: str):
     """Get information about a specific YouTube video"""
     try:
-        from backend.youtube_search.service import YouTubeSearchService
-        
-        search_service = YouTubeSearchService()
-        video_info = search_service.get_video_info(url)
+        video_info = await asyncio.to_thread(lambda: _youtube_search_service().get_video_info(url))
         
         if not video_info:
             raise HTTPException(status_code=404, detail="Video not found or invalid URL")
@@ -510,115 +762,362 @@ async def get_youtube_video_info(url: str):
         logger.error(f"Error getting YouTube video info: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# Videos are never deleted, so once a video is known to exist that answer can
+# be reused; the endpoints that only 404 on unknown videos check this first.
+# Misses aren't cached, so a newly created video is visible immediately
+_video_exists_cache = TTLCache(maxsize=4096, ttl=300)
+_video_exists_cache_lock = threading.Lock()
+
+def _video_exists(db: Session, video_id: int) -> bool:
+    """Whether a video exists, answered from a small cache when possible"""
+    with _video_exists_cache_lock:
+        if video_id in _video_exists_cache:
+            return True
+    
+    exists = db.query(Video.id).filter(Video.id == video_id).scalar() is not None
+    if exists:
+        with _video_exists_cache_lock:
+            _video_exists_cache[video_id] = True
+    return exists
+
+# The only columns a processing status is derived from
+_STATUS_COLUMNS = (Video.id, Video.processed, Video.transcript_generated, Video.frames_extracted)
+
+# Statements for the hot read endpoints are built once with bound parameters,
+# so requests skip constructing the expression and computing its cache key
+_STATUS_STMT = select(*_STATUS_COLUMNS).where(Video.id == bindparam("video_id"))
+
+def _build_video_status(video, generation: int) -> dict:
+    """
+    Build (and cache) the processing status of a video record or _STATUS_COLUMNS row.
+    The status is built from trusted database values, so it is kept as a plain
+    dict in the VideoProcessingStatus shape and returned without re-validation.
+    generation is the video's _status_generation from before the row was read
+    """
+    status = "processing"
+    if video.processed and video.transcript_generated and video.frames_extracted:
+        status = "completed"
+    elif video.processed:
+        status = "partially_completed"
+    
+    result = {
+        "video_id": video.id,
+        "processed": video.processed,
+        "transcript_generated": video.transcript_generated,
+        "frames_extracted": video.frames_extracted,
+        "status": status
+    }
+    # Only finished videos are cached: a video still processing may be completed
+    # by another worker, whose invalidation this process never sees
+    if video.processed:
+        with _status_cache_lock:
+            # Skip caching if the video changed while the row was being read
+            if _status_generations.get(video.id, 0) == generation:
+                _status_cache[video.id] = result
+    return result
+
 @app.get("/video/{video_id}/status", response_model=VideoProcessingStatus)
-async def get_video_status(video_id: int, db: Session = Depends(get_db)):
+def get_video_status(video_id: int, db: Session = Depends(get_request_db)):
     """Get processing status of a video"""
+    # Responses are returned directly so FastAPI skips response_model validation
+    cached = _get_cached_status(video_id)
+    if cached is not None:
+        return ORJSONResponse(content=cached)
+    
     try:
-        video = db.query(Video).filter(Video.id == video_id).first()
+        generation = _status_generation(video_id)
+        video = db.execute(_STATUS_STMT, {"video_id": video_id}).first()
         if not video:
             raise HTTPException(status_code=404, detail="Video not found")
         
-        status = "processing"
-        if video.processed and video.transcript_generated and video.frames_extracted:
-            status = "completed"
-        elif video.processed:
-            status = "partially_completed"
-        
-        return VideoProcessingStatus(
-            video_id=video.id,
-            processed=video.processed,
-            transcript_generated=video.transcript_generated,
-            frames_extracted=video.frames_extracted,
-            status=status
-        )
+        return ORJSONResponse(content=_build_video_status(video, generation))
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting video status: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/videos/status", response_model=List[VideoProcessingStatus])
+def get_videos_status(request: BatchVideoStatusRequest, db: Session = Depends(get_request_db)):
+    """Get processing status of several videos in one round-trip"""
+    try:
+        statuses = {}
+        missing_ids = []
+        for video_id in request.video_ids:
+            cached = _get_cached_status(video_id)
+            if cached is not None:
+                statuses[video_id] = cached
+            else:
+                missing_ids.append(video_id)
+        
+        # Fetch every uncached video with a single IN query
+        if missing_ids:
+            generations = {video_id: _status_generation(video_id) for video_id in missing_ids}
+            videos = db.query(*_STATUS_COLUMNS).filter(Video.id.in_(missing_ids)).all()
+            for video in videos:
+                statuses[video.id] = _build_video_status(video, generations[video.id])
+        
+        # Unknown video IDs are omitted from the response
+        return ORJSONResponse(
+            content=[statuses[video_id] for video_id in request.video_ids if video_id in statuses]
+        )
+        
+    except Exception as e:
+        logger.error(f"Error getting video statuses: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Columns returned for each transcript chunk and frame in listings
+_TRANSCRIPT_COLUMNS = {
+    "id": TranscriptChunk.id,
+    "text": TranscriptChunk.text,
+    "start_time": TranscriptChunk.start_time,
+    "end_time": TranscriptChunk.end_time,
+    "confidence": TranscriptChunk.confidence
+}
+
+_FRAME_COLUMNS = {
+    "id": VideoFrame.id,
+    "frame_path": VideoFrame.frame_path,
+    "timestamp": VideoFrame.timestamp,
+    "frame_number": VideoFrame.frame_number,
+    "width": VideoFrame.width,
+    "height": VideoFrame.height
+}
+
+def _json_rows_aggregate(columns: dict, order_by):
+    """PostgreSQL expression rendering the selected rows as one JSON array string"""
+    row = func.json_build_object(*[
+        part for key, column in columns.items() for part in (literal_column(f"'{key}'"), column)
+    ])
+    return func.coalesce(cast(func.json_agg(aggregate_order_by(row, order_by)), Text), "[]")
+
+def _transcript_json(video_id):
+    """PostgreSQL scalar subquery returning a video's transcript chunks as a JSON array string"""
+    return select(_json_rows_aggregate(_TRANSCRIPT_COLUMNS, TranscriptChunk.start_time)) \
+        .where(TranscriptChunk.video_id == video_id).scalar_subquery()
+
+def _frames_json(video_id):
+    """PostgreSQL scalar subquery returning a video's frames as a JSON array string"""
+    return select(_json_rows_aggregate(_FRAME_COLUMNS, VideoFrame.timestamp)) \
+        .where(VideoFrame.video_id == video_id).scalar_subquery()
+
+def _video_rows_stmt(model, columns: dict, order_by):
+    """A video's filename and processed flag joined to its child rows, for the video_id parameter"""
+    return select(Video.filename, Video.processed, *columns.values()).outerjoin(
+        model, model.video_id == Video.id
+    ).where(Video.id == bindparam("video_id")).order_by(order_by)
+
+_TRANSCRIPT_ROWS_STMT = _video_rows_stmt(TranscriptChunk, _TRANSCRIPT_COLUMNS, TranscriptChunk.start_time)
+_FRAME_ROWS_STMT = _video_rows_stmt(VideoFrame, _FRAME_COLUMNS, VideoFrame.timestamp)
+
+def _load_video_rows(db: Session, video_id: int, stmt, columns: dict) -> Optional[Tuple[str, bool, List[dict]]]:
+    """
+    Load a video's filename, processed flag and child rows in one query, or
+    None if the video doesn't exist
+    """
+    rows = db.execute(stmt, {"video_id": video_id}).all()
+    if not rows:
+        return None
+    
+    # A video with no children comes back as a single row of NULL child columns
+    return rows[0][0], rows[0][1], [dict(zip(columns, row[2:])) for row in rows if row[2] is not None]
+
+def _list_transcript_chunks(db: Session, video_id: int) -> Optional[Tuple[str, bool, List[dict]]]:
+    return _load_video_rows(db, video_id, _TRANSCRIPT_ROWS_STMT, _TRANSCRIPT_COLUMNS)
+
+def _list_frames(db: Session, video_id: int) -> Optional[Tuple[str, bool, List[dict]]]:
+    return _load_video_rows(db, video_id, _FRAME_ROWS_STMT, _FRAME_COLUMNS)
+
+# Serialized transcript/frame documents keyed by (video_id, sections). Only
+# documents of processed videos are cached: a video still processing may be
+# completed by another worker, whose invalidation this process never sees
+_document_cache = TTLCache(maxsize=256, ttl=300)
+_document_cache_lock = threading.Lock()
+# Bumped on every invalidation so an in-flight rebuild can't cache stale data
+_document_generations: Dict[int, int] = {}
+# Striped locks serializing rebuilds of the same document
+_document_build_locks = [threading.Lock() for _ in range(64)]
+
+# Section name -> (PostgreSQL JSON subquery, Python row loader)
+_VIDEO_SECTIONS = {
+    "transcript_chunks": (_transcript_json, _list_transcript_chunks),
+    "frames": (_frames_json, _list_frames)
+}
+
+def _invalidate_cached_documents(video_id: int):
+    """Drop a video's cached transcript/frame documents after it changes"""
+    with _document_cache_lock:
+        _document_generations[video_id] = _document_generations.get(video_id, 0) + 1
+        for key in [key for key in _document_cache if key[0] == video_id]:
+            _document_cache.pop(key, None)
+
+def _etag(content: bytes) -> str:
+    """Strong ETag for a response body"""
+    return f'"{hashlib.blake2b(content, digest_size=16).hexdigest()}"'
+
+# Bodies can still change while a video is processing, so clients may only reuse
+# a response for a few seconds; after that they revalidate with If-None-Match
+ETAG_MAX_AGE = int(os.getenv("ETAG_MAX_AGE", "5"))
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak If-None-Match comparison; proxies that compress bodies add a W/ prefix"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+def _etag_json_response(request: Request, content: bytes, etag: Optional[str] = None) -> Response:
+    """JSON response with an ETag, or an empty 304 if the client already has this version"""
+    etag = etag or _etag(content)
+    headers = {"ETag": etag, "Cache-Control": f"private, max-age={ETAG_MAX_AGE}"}
+    
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    
+    return Response(content=content, media_type="application/json", headers=headers)
+
+# PostgreSQL document statement per requested sections, built on first use
+_document_stmts: Dict[Tuple[str, ...], Any] = {}
+
+def _build_video_document(db: Session, video_id: int, sections: Tuple[str, ...]) -> Optional[Tuple[bytes, bool]]:
+    """
+    Serialized JSON of a video's filename and the requested sections, together
+    with the video's processed flag, or None if it doesn't exist
+    """
+    if engine.dialect.name == "postgresql":
+        # One round trip: the filename plus each section aggregated to JSON in the database
+        stmt = _document_stmts.get(sections)
+        if stmt is None:
+            stmt = _document_stmts[sections] = select(
+                Video.filename, Video.processed, *[_VIDEO_SECTIONS[name][0](Video.id) for name in sections]
+            ).where(Video.id == bindparam("video_id"))
+        row = db.execute(stmt, {"video_id": video_id}).first()
+        if not row:
+            return None
+        body = "".join(f',"{name}":{rows_json}' for name, rows_json in zip(sections, row[2:]))
+        return f'{{"video_id":{video_id},"video_filename":{json.dumps(row[0])}{body}}}'.encode(), bool(row[1])
+    
+    document = {"video_id": video_id}
+    processed = True
+    for name in sections:
+        loaded = _VIDEO_SECTIONS[name][1](db, video_id)
+        if loaded is None:
+            return None
+        document["video_filename"], section_processed, document[name] = loaded
+        processed = processed and bool(section_processed)
+    return orjson.dumps(document), processed
+
+def _video_document(db: Session, video_id: int, sections: Tuple[str, ...]) -> Optional[Tuple[bytes, str]]:
+    """
+    Serialized JSON of a video's filename and the requested sections, with its
+    ETag, or None if the video doesn't exist. Cache hits are returned as stored
+    bytes
+    """
+    cache_key = (video_id, sections)
+    with _document_cache_lock:
+        cached = _document_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    # Only one request rebuilds a given document; the rest wait and reuse its result
+    with _document_build_locks[hash(cache_key) % len(_document_build_locks)]:
+        with _document_cache_lock:
+            cached = _document_cache.get(cache_key)
+            generation = _document_generations.get(video_id, 0)
+        if cached is not None:
+            return cached
+        
+        built = _build_video_document(db, video_id, sections)
+        if built is None:
+            return None
+        
+        content, processed = built
+        document = (content, _etag(content))
+        if processed:
+            with _document_cache_lock:
+                # Skip caching if the video changed while the document was being built
+                if _document_generations.get(video_id, 0) == generation:
+                    _document_cache[cache_key] = document
+        return document
+
 @app.get("/video/{video_id}/transcript")
-async def get_video_transcript(video_id: int, db: Session = Depends(get_db)):
+def get_video_transcript(video_id: int, request: Request, db: Session = Depends(get_request_db)):
     """Get transcript for a video"""
     try:
-        video = db.query(Video).filter(Video.id == video_id).first()
-        if not video:
+        document = _video_document(db, video_id, ("transcript_chunks",))
+        if document is None:
             raise HTTPException(status_code=404, detail="Video not found")
         
-        transcript_chunks = db.query(TranscriptChunk).filter(
-            TranscriptChunk.video_id == video_id
-        ).order_by(TranscriptChunk.start_time).all()
-        
-        return {
-            "video_id": video_id,
-            "video_filename": video.filename,
-            "transcript_chunks": [
-                {
-                    "id": chunk.id,
-                    "text": chunk.text,
-                    "start_time": chunk.start_time,
-                    "end_time": chunk.end_time,
-                    "confidence": chunk.confidence
-                }
-                for chunk in transcript_chunks
-            ]
-        }
+        return _etag_json_response(request, *document)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting transcript: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/video/{video_id}/frames")
-async def get_video_frames(video_id: int, db: Session = Depends(get_db)):
+def get_video_frames(video_id: int, request: Request, db: Session = Depends(get_request_db)):
     """Get extracted frames for a video"""
     try:
-        video = db.query(Video).filter(Video.id == video_id).first()
-        if not video:
+        document = _video_document(db, video_id, ("frames",))
+        if document is None:
             raise HTTPException(status_code=404, detail="Video not found")
         
-        frames = db.query(VideoFrame).filter(
-            VideoFrame.video_id == video_id
-        ).order_by(VideoFrame.timestamp).all()
-        
-        return {
-            "video_id": video_id,
-            "video_filename": video.filename,
-            "frames": [
-                {
-                    "id": frame.id,
-                    "frame_path": frame.frame_path,
-                    "timestamp": frame.timestamp,
-                    "frame_number": frame.frame_number,
-                    "width": frame.width,
-                    "height": frame.height
-                }
-                for frame in frames
-            ]
-        }
+        return _etag_json_response(request, *document)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting frames: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/video/{video_id}/bundle")
+def get_video_bundle(video_id: int, request: Request, db: Session = Depends(get_request_db)):
+    """Get transcript and frames for a video in one response"""
+    try:
+        document = _video_document(db, video_id, ("transcript_chunks", "frames"))
+        if document is None:
+            raise HTTPException(status_code=404, detail="Video not found")
+        
+        return _etag_json_response(request, *document)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting video bundle: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+_LIST_VIDEOS_STMT = select(
+    Video.id,
+    Video.filename,
+    Video.original_filename,
+    Video.duration,
+    Video.created_at,
+    Video.processed,
+    Video.transcript_generated,
+    Video.frames_extracted
+).where(Video.id > bindparam("after_id")).order_by(Video.id).limit(bindparam("limit"))
+
 @app.get("/videos")
-async def list_videos(db: Session = Depends(get_db)):
-    """List all videos"""
+def list_videos(
+    after_id: int = 0,
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_request_db)
+):
+    """List videos in ID order, one page at a time (pass next_after_id to get the next page)"""
     try:
-        videos = db.query(Video).all()
-        return {
-            "videos": [
-                {
-                    "id": video.id,
-                    "filename": video.filename,
-                    "original_filename": video.original_filename,
-                    "duration": video.duration,
-                    "created_at": video.created_at.isoformat(),
-                    "processed": video.processed,
-                    "transcript_generated": video.transcript_generated,
-                    "frames_extracted": video.frames_extracted
-                }
-                for video in videos
-            ]
-        }
+        # Keyset pagination over the primary key, fetching only the listed columns
+        videos = db.execute(_LIST_VIDEOS_STMT, {"after_id": after_id, "limit": limit}).all()
+        
+        # Returned directly so orjson encodes the rows (datetimes included)
+        # without FastAPI's jsonable_encoder pass over every value first
+        return ORJSONResponse(content={
+            "videos": [video._asdict() for video in videos],
+            "next_after_id": videos[-1].id if len(videos) == limit else None
+        })
     except Exception as e:
         logger.error(f"Error listing videos: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -631,18 +1130,24 @@ async def list_videos(db: Session = Depends(get_db)):
 async def generate_embeddings(
     request: EmbeddingRequest,
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_request_db)
 ):
     """Generate embeddings for video content"""
     if not PHASE2_AVAILABLE:
         raise HTTPException(status_code=501, detail="Phase 2 features not available. Install embedding requirements.")
     
     try:
-        # Validate video IDs
+        requested_ids = list(request.video_ids)
+        if request.video_id is not None and request.video_id not in requested_ids:
+            requested_ids.insert(0, request.video_id)
+        
+        # Validate video IDs with a single query
+        existing_ids = {
+            video_id for (video_id,) in db.query(Video.id).filter(Video.id.in_(requested_ids))
+        }
         valid_videos = []
-        for video_id in request.video_ids:
-            video = db.query(Video).filter(Video.id == video_id).first()
-            if video:
+        for video_id in requested_ids:
+            if video_id in existing_ids:
                 valid_videos.append(video_id)
             else:
                 logger.warning(f"Video {video_id} not found")
@@ -651,46 +1156,64 @@ async def generate_embeddings(
             raise HTTPException(status_code=400, detail="No valid video IDs provided")
         
         # Start background embedding generation
-        for video_id in valid_videos:
-            background_tasks.add_task(generate_embeddings_background, video_id)
-        
-        # Return initial status
-        results = []
-        for video_id in valid_videos:
-            results.append(EmbeddingStatus(
-                video_id=video_id,
-                text_embeddings_count=0,
-                frame_embeddings_count=0,
-                status="processing"
-            ))
-        
-        return results
+        background_tasks.add_task(generate_embeddings_for_videos, valid_videos)
+        
+        # Return initial status, built server-side so it skips response validation
+        return ORJSONResponse(content=[
+            {
+                "video_id": video_id,
+                "text_embeddings_count": 0,
+                "frame_embeddings_count": 0,
+                "status": "processing"
+            }
+            for video_id in valid_videos
+        ])
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error generating embeddings: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/v1/embeddings/status/{video_id}", response_model=EmbeddingStatus)
-async def get_embedding_status(video_id: int, db: Session = Depends(get_db)):
+async def get_embedding_status(
+    video_id: int,
+    counts: bool = Query(False, description="Also count the video's transcript chunks and frames"),
+    db: Session = Depends(get_request_db)
+):
     """Get embedding generation status for a video"""
     if not PHASE2_AVAILABLE:
         raise HTTPException(status_code=501, detail="Phase 2 features not available")
     
     try:
-        video = db.query(Video).filter(Video.id == video_id).first()
-        if not video:
+        # Check the video exists and look for existing embeddings (this is a
+        # simplified check) in one round trip. EXISTS stops at the first row;
+        # the full counts are only computed on request
+        if counts:
+            transcript_column = (
+                select(func.count()).select_from(TranscriptChunk)
+                .where(TranscriptChunk.video_id == Video.id).scalar_subquery()
+            )
+            frame_column = (
+                select(func.count()).select_from(VideoFrame)
+                .where(VideoFrame.video_id == Video.id).scalar_subquery()
+            )
+        else:
+            transcript_column = select(TranscriptChunk.id).where(TranscriptChunk.video_id == Video.id).exists()
+            frame_column = select(VideoFrame.id).where(VideoFrame.video_id == Video.id).exists()
+        
+        row = db.execute(select(transcript_column, frame_column).where(Video.id == video_id)).first()
+        if not row:
             raise HTTPException(status_code=404, detail="Video not found")
         
-        # Count existing embeddings (this is a simplified check)
-        transcript_count = db.query(TranscriptChunk).filter(TranscriptChunk.video_id == video_id).count()
-        frame_count = db.query(VideoFrame).filter(VideoFrame.video_id == video_id).count()
+        has_transcript, has_frames = row
         
-        return EmbeddingStatus(
-            video_id=video_id,
-            text_embeddings_count=transcript_count,
-            frame_embeddings_count=frame_count,
-            status="completed" if transcript_count > 0 or frame_count > 0 else "pending"
-        )
+        return ORJSONResponse(content={
+            "video_id": video_id,
+            "text_embeddings_count": has_transcript if counts else None,
+            "frame_embeddings_count": has_frames if counts else None,
+            "status": "completed" if has_transcript or has_frames else "pending"
+        })
         
     except HTTPException:
         raise
@@ -708,26 +1231,39 @@ async def semantic_search(request: SearchRequest):
         embedding_engine = await get_embedding_engine()
         
         # Generate query embedding
-        query_embedding = await embedding_engine.generate_text_embeddings([request.query])
+        query_embedding = await embedding_engine.embed_query(request.query)
         
         # Search for similar content
         results = await embedding_engine.search_similar_content(
-            query_embedding[0],
-            content_type=request.search_type,
-            limit=request.max_results,
-            video_id=request.video_ids[0] if request.video_ids and len(request.video_ids) == 1 else None
+            query_embedding,
+            content_type="both",
+            limit=request.top_k,
+            video_id=request.video_id
         )
         
-        return SearchResult(
-            query=request.query,
-            results=results,
-            total_results=len(results)
-        )
+        # Result lists are large and built server-side; encode them directly
+        # instead of re-validating every hit
+        return ORJSONResponse(content={
+            "query": request.query,
+            "results": results,
+            "total_results": len(results)
+        })
         
     except Exception as e:
         logger.error(f"Error in semantic search: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# Answers to near-duplicate questions about the same videos are reused instead
+# of paying for another LLM call. Only touched from the event loop
+rag_response_cache = SemanticCache(similarity_threshold=0.95) if PHASE2_AVAILABLE else None
+
+def _invalidate_cached_responses(video_id: int):
+    """Drop cached RAG and chat answers that may have been built from a video"""
+    if rag_response_cache is not None:
+        rag_response_cache.invalidate_video(video_id)
+    if conversation_manager is not None:
+        conversation_manager.response_cache.invalidate_video(video_id)
+
 @app.post("/api/v1/query/multimodal", response_model=RAGResponse)
 async def multimodal_query(request: RAGRequest):
     """Ask questions about video content using RAG"""
@@ -735,50 +1271,86 @@ async def multimodal_query(request: RAGRequest):
         raise HTTPException(status_code=501, detail="Phase 2 features not available")
     
     try:
-        # Get OpenAI API key from environment
-        openai_api_key = os.getenv("OPENAI_API_KEY")
+        rag_system = await get_rag_system(OPENAI_API_KEY)
         
-        rag_system = await get_rag_system(openai_api_key)
+        video_ids = list(request.video_ids)
+        if request.video_id is not None and request.video_id not in video_ids:
+            video_ids.insert(0, request.video_id)
+        search_type = "both" if request.include_visual else "text"
         
-        # Process the query
-        result = await rag_system.process_query(
-            query=request.query,
-            video_ids=request.video_ids,
-            search_type=request.search_type,
-            max_results=request.max_results
-        )
+        # Retrieval settings are part of the scope; the video IDs follow so a
+        # video's entries can be invalidated
+        cache_scope = (search_type, *sorted(video_ids))
+        try:
+            query_embedding = await rag_system.embedding_engine.embed_query(request.query)
+        except Exception:
+            query_embedding = None
+        result = rag_response_cache.lookup(cache_scope, query_embedding) if query_embedding is not None else None
+        
+        if result is None:
+            # Process the query
+            result = await rag_system.process_query(
+                query=request.query,
+                video_ids=video_ids or None,
+                search_type=search_type
+            )
+            # Answers without retrieved context (including errors) aren't worth reusing
+            if query_embedding is not None and result["context"]:
+                rag_response_cache.store(cache_scope, query_embedding, result)
         
-        return RAGResponse(
-            query=result["query"],
-            response=result["response"],
-            context=result["context"],
-            video_ids=result["video_ids"]
-        )
+        return ORJSONResponse(content={
+            "query": result["query"],
+            "response": result["response"],
+            "context": result["context"],
+            "video_ids": result["video_ids"]
+        })
         
     except Exception as e:
         logger.error(f"Error in multimodal query: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# Summaries cost an LLM call over the whole transcript; keep them until the
+# video is reprocessed. Only touched from the event loop
+_summary_cache = TTLCache(maxsize=256, ttl=int(os.getenv("SUMMARY_CACHE_SECONDS", "86400")))
+
+# What a summary is generated from, read from the database so every worker sees
+# reprocessing: the processed flag and the newest transcript chunk and frame
+# IDs, which change whenever a video's rows are replaced
+_SUMMARY_VERSION_STMT = select(
+    Video.processed,
+    select(func.max(TranscriptChunk.id)).where(TranscriptChunk.video_id == Video.id).scalar_subquery(),
+    select(func.max(VideoFrame.id)).where(VideoFrame.video_id == Video.id).scalar_subquery()
+).where(Video.id == bindparam("video_id"))
+
 @app.get("/api/v1/video/{video_id}/summary", response_model=VideoSummaryResponse)
-async def get_video_summary(video_id: int, db: Session = Depends(get_db)):
+async def get_video_summary(video_id: int, db: Session = Depends(get_request_db)):
     """Generate a comprehensive summary of a video"""
     if not PHASE2_AVAILABLE:
         raise HTTPException(status_code=501, detail="Phase 2 features not available")
     
     try:
-        video = db.query(Video).filter(Video.id == video_id).first()
-        if not video:
+        # A summary only depends on the video's transcript and frames, so it is
+        # keyed by their persisted version
+        version = db.execute(_SUMMARY_VERSION_STMT, {"video_id": video_id}).first()
+        if not version:
             raise HTTPException(status_code=404, detail="Video not found")
         
-        # Get OpenAI API key from environment
-        openai_api_key = os.getenv("OPENAI_API_KEY")
-        
-        rag_system = await get_rag_system(openai_api_key)
+        cache_key = (video_id, *version)
+        summary_result = _summary_cache.get(cache_key)
         
-        # Generate summary
-        summary_result = await rag_system.summarize_video(video_id)
+        if summary_result is None:
+            rag_system = await get_rag_system(OPENAI_API_KEY)
+            
+            # Generate summary
+            summary_result = await rag_system.summarize_video(video_id)
+            # The failure flag is internal and not part of the response
+            summary_failed = summary_result.pop("summary_failed", False)
+            # Summaries of videos still processing, and failed LLM calls, are
+            # regenerated on the next request instead of cached
+            if version.processed and not summary_failed:
+                _summary_cache[cache_key] = summary_result
         
-        return VideoSummaryResponse(**summary_result)
+        return ORJSONResponse(content=summary_result)
         
     except HTTPException:
         raise
@@ -787,26 +1359,31 @@ async def get_video_summary(video_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/v1/similarity/find/{video_id}")
-async def find_similar_videos(video_id: int, limit: int = 5, db: Session = Depends(get_db)):
+async def find_similar_videos(video_id: int, limit: int = Query(5, ge=1, le=50), db: Session = Depends(get_request_db)):
     """Find videos similar to the given video"""
     if not PHASE2_AVAILABLE:
         raise HTTPException(status_code=501, detail="Phase 2 features not available")
     
     try:
-        video = db.query(Video).filter(Video.id == video_id).first()
-        if not video:
+        if not _video_exists(db, video_id):
             raise HTTPException(status_code=404, detail="Video not found")
         
-        # This is a placeholder for video-to-video similarity
-        # In full implementation, you would:
-        # 1. Get the average embedding for the video
-        # 2. Search for similar videos using that embedding
-        # 3. Return ranked results
+        # One search over the precomputed per-video average embeddings
+        embedding_engine = await get_embedding_engine()
+        similar_videos = await embedding_engine.find_similar_videos(video_id, limit)
+        
+        if similar_videos:
+            filenames = dict(
+                db.query(Video.id, Video.filename)
+                .filter(Video.id.in_([match["video_id"] for match in similar_videos]))
+                .all()
+            )
+            for match in similar_videos:
+                match["filename"] = filenames.get(match["video_id"])
         
         return {
             "video_id": video_id,
-            "similar_videos": [],
-            "message": "Video similarity feature coming soon"
+            "similar_videos": similar_videos
         }
         
     except HTTPException:
@@ -820,7 +1397,7 @@ async def find_similar_videos(video_id: int, limit: int = 5, db: Session = Depen
 # ===============================
 
 @app.post("/api/v1/conversation/start", response_model=dict)
-async def start_conversation(video_id: int, db: Session = Depends(get_db)):
+async def start_conversation(video_id: int, db: Session = Depends(get_request_db)):
     """Start a new conversation session for a video"""
     if not PHASE3_TO_5_AVAILABLE:
         raise HTTPException(status_code=501, detail="Phase 3-5 features not available")
@@ -869,7 +1446,7 @@ async def visual_search(request: dict):
             raise HTTPException(status_code=500, detail="Visual search engine not available")
         
         # Perform the visual search
-        results = visual_search_engine.search(request["image_path"], request.get("top_k", 5))
+        results = await _run_inference(visual_search_engine.search, request["image_path"], request.get("top_k", 5))
         
         return {"results": results}
         
@@ -888,7 +1465,7 @@ async def content_navigation(request: dict):
             raise HTTPException(status_code=500, detail="Content segmentation engine not available")
         
         # Segment the content
-        segments = content_segmentation_engine.segment(request["video_id"], request.get("threshold", 0.5))
+        segments = await _run_inference(content_segmentation_engine.segment, request["video_id"], request.get("threshold", 0.5))
         
         return {"segments": segments}
         
@@ -897,134 +1474,167 @@ async def content_navigation(request: dict):
         raise HTTPException(status_code=500, detail=str(e))
 
 # Background processing functions
+
+# Rows per INSERT/commit when storing processing results, so long videos don't
+# build one huge transaction
+INSERT_BATCH_ROWS = int(os.getenv("INSERT_BATCH_ROWS", "1000"))
+
+def _bulk_insert_in_batches(db: Session, model, rows: List[Dict]):
+    """Insert rows with one multi-row INSERT and commit per batch"""
+    for start in range(0, len(rows), INSERT_BATCH_ROWS):
+        db.bulk_insert_mappings(model, rows[start:start + INSERT_BATCH_ROWS])
+        db.commit()
+
+def _transcript_rows(video_id: int, transcript_chunks: List[Dict]) -> List[Dict]:
+    return [
+        {
+            "video_id": video_id,
+            "text": chunk["text"],
+            "start_time": chunk["start_time"],
+            "end_time": chunk["end_time"],
+            "confidence": chunk["confidence"]
+        }
+        for chunk in transcript_chunks
+    ]
+
+def _save_processed_video(db: Session, video_id: int, transcript_chunks: List[Dict], frames_data: List[Tuple]):
+    """Store an uploaded video's transcript and frames and mark it processed"""
+    # Save transcript chunks and frame data in batched multi-row inserts
+    _bulk_insert_in_batches(db, TranscriptChunk, _transcript_rows(video_id, transcript_chunks))
+    _bulk_insert_in_batches(db, VideoFrame, [
+        {
+            "video_id": video_id,
+            "frame_path": frame_path,
+            "timestamp": timestamp,
+            "frame_number": frame_number,
+            "width": width,
+            "height": height
+        }
+        for frame_path, timestamp, frame_number, width, height in frames_data
+    ])
+    
+    # Update video status in a single UPDATE, no prior SELECT
+    db.execute(
+        update(Video)
+        .where(Video.id == video_id)
+        .values(processed=True, transcript_generated=True, frames_extracted=True)
+    )
+    
+    db.commit()
+
+def _save_processed_youtube_video(db: Session, video_id: int, transcript_chunks: List[Dict], metadata: Dict):
+    """Store a YouTube video's transcript and metadata and mark it processed"""
+    # Save transcript chunks to database in batched multi-row inserts
+    _bulk_insert_in_batches(db, TranscriptChunk, _transcript_rows(video_id, transcript_chunks))
+    
+    # Update video metadata and status in a single UPDATE
+    db.execute(
+        update(Video)
+        .where(Video.id == video_id)
+        .values(
+            duration=metadata.get("duration", 0),
+            width=metadata.get("width", 0),
+            height=metadata.get("height", 0),
+            fps=metadata.get("fps", 0),
+            processed=True,
+            transcript_generated=True,
+            frames_extracted=False  # YouTube videos don't extract frames in Phase 1
+        )
+    )
+    
+    db.commit()
+
+def _mark_video_failed(db: Session, video_id: int):
+    """Update video with error status, dropping any batches already committed"""
+    db.rollback()
+    db.execute(delete(TranscriptChunk).where(TranscriptChunk.video_id == video_id))
+    db.execute(delete(VideoFrame).where(VideoFrame.video_id == video_id))
+    db.execute(update(Video).where(Video.id == video_id).values(processed=False))
+    db.commit()
+
+# The media work runs on its pools and the database writes, which block too,
+# run in a worker thread, so none of it stalls the event loop. Rows are only
+# written once all media work is done, so no write transaction is held open
+# while transcribing
 async def process_video_background(video_id: int, video_path: str):
     """Background task to process uploaded video"""
-    db = next(get_db())
-    try:
-        logger.info(f"Starting background processing for video {video_id}")
-        
-        # Generate transcript
-        transcript_chunks = transcript_handler.transcribe_video_file(video_path)
-        
-        # Save transcript chunks to database
-        for chunk in transcript_chunks:
-            db_chunk = TranscriptChunk(
-                video_id=video_id,
-                text=chunk["text"],
-                start_time=chunk["start_time"],
-                end_time=chunk["end_time"],
-                confidence=chunk["confidence"]
-            )
-            db.add(db_chunk)
-        
-        # Extract frames
-        frames_data = video_processor.extract_frames(video_path, video_id, fps=1.0)
-        
-        # Save frame data to database
-        for frame_data in frames_data:
-            db_frame = VideoFrame(
-                video_id=video_id,
-                frame_path=frame_data["frame_path"],
-                timestamp=frame_data["timestamp"],
-                frame_number=frame_data["frame_number"],
-                width=frame_data["width"],
-                height=frame_data["height"]
+    with SessionLocal(expire_on_commit=False) as db:
+        try:
+            logger.info(f"Starting background processing for video {video_id}")
+            
+            # Transcription (media pool) and frame extraction (frame pool) run side by side
+            transcript_chunks, frames_data = await asyncio.gather(
+                _run_media_task(transcript_handler.transcribe_video_file, video_path),
+                _extract_frames(video_path, video_id, 1.0)
             )
-            db.add(db_frame)
-        
-        # Update video status
-        video = db.query(Video).filter(Video.id == video_id).first()
-        if video:
-            video.processed = True
-            video.transcript_generated = True
-            video.frames_extracted = True
-        
-        db.commit()
-        logger.info(f"Successfully processed video {video_id}")
-        
-    except Exception as e:
-        logger.error(f"Error in background processing for video {video_id}: {str(e)}")
-        # Update video with error status
-        video = db.query(Video).filter(Video.id == video_id).first()
-        if video:
-            video.processed = False
-        db.commit()
-    finally:
-        db.close()
+            
+            await asyncio.to_thread(_save_processed_video, db, video_id, transcript_chunks, frames_data)
+            logger.info(f"Successfully processed video {video_id}")
+            
+        except Exception as e:
+            logger.error(f"Error in background processing for video {video_id}: {str(e)}")
+            await asyncio.to_thread(_mark_video_failed, db, video_id)
+        finally:
+            _invalidate_cached_status(video_id)
+            _invalidate_cached_documents(video_id)
+            _invalidate_cached_responses(video_id)
 
 async def process_youtube_background(video_id: int, video_url: str, use_whisper: bool = False, model_size: str = "base"):
     """Background task to process YouTube video"""
-    db = next(get_db())
-    try:
-        logger.info(f"Starting background processing for YouTube video {video_id}")
-        
-        # Get transcript and metadata
-        transcript_chunks, metadata = transcript_handler.process_youtube_video(
-            video_url, use_whisper, model_size
-        )
-        
-        # Update video metadata
-        video = db.query(Video).filter(Video.id == video_id).first()
-        if video:
-            video.duration = metadata.get("duration", 0)
-            video.width = metadata.get("width", 0)
-            video.height = metadata.get("height", 0)
-            video.fps = metadata.get("fps", 0)
-        
-        # Save transcript chunks to database
-        for chunk in transcript_chunks:
-            db_chunk = TranscriptChunk(
-                video_id=video_id,
-                text=chunk["text"],
-                start_time=chunk["start_time"],
-                end_time=chunk["end_time"],
-                confidence=chunk["confidence"]
+    with SessionLocal(expire_on_commit=False) as db:
+        try:
+            logger.info(f"Starting background processing for YouTube video {video_id}")
+            
+            # Get transcript and metadata
+            transcript_chunks, metadata = await _run_media_task(
+                transcript_handler.process_youtube_video, video_url, use_whisper, model_size
             )
-            db.add(db_chunk)
-        
-        # Update video status
-        if video:
-            video.processed = True
-            video.transcript_generated = True
-            video.frames_extracted = False  # YouTube videos don't extract frames in Phase 1
-        
-        db.commit()
-        logger.info(f"Successfully processed YouTube video {video_id}")
-        
-    except Exception as e:
-        logger.error(f"Error in background processing for YouTube video {video_id}: {str(e)}")
-        # Update video with error status
-        video = db.query(Video).filter(Video.id == video_id).first()
-        if video:
-            video.processed = False
-        db.commit()
-    finally:
-        db.close()
+            
+            await asyncio.to_thread(_save_processed_youtube_video, db, video_id, transcript_chunks, metadata)
+            logger.info(f"Successfully processed YouTube video {video_id}")
+            
+        except Exception as e:
+            logger.error(f"Error in background processing for YouTube video {video_id}: {str(e)}")
+            await asyncio.to_thread(_mark_video_failed, db, video_id)
+        finally:
+            _youtube_inflight.pop(transcript_handler.extract_youtube_video_id(video_url), None)
+            _invalidate_cached_status(video_id)
+            _invalidate_cached_documents(video_id)
+            _invalidate_cached_responses(video_id)
+
+# Videos being embedded at once, across all requests; their model calls and
+# writes overlap while the embedding models aren't oversubscribed
+_embedding_slots = asyncio.Semaphore(int(os.getenv("EMBEDDING_CONCURRENCY", "4")))
 
 # Background task for embedding generation
 async def generate_embeddings_background(video_id: int):
     """Background task to generate embeddings for a video"""
-    try:
-        embedding_engine = await get_embedding_engine()
-        await embedding_engine.process_video_embeddings(video_id)
-        logger.info(f"Completed embedding generation for video {video_id}")
-        
-    except Exception as e:
-        logger.error(f"Error in background embedding generation for video {video_id}: {e}")
+    async with _embedding_slots:
+        try:
+            embedding_engine = await get_embedding_engine()
+            await embedding_engine.process_video_embeddings(video_id)
+            _invalidate_cached_responses(video_id)
+            logger.info(f"Completed embedding generation for video {video_id}")
+            
+        except Exception as e:
+            logger.error(f"Error in background embedding generation for video {video_id}: {e}")
+
+async def generate_embeddings_for_videos(video_ids: List[int]):
+    """Background task to generate embeddings for several videos concurrently"""
+    await asyncio.gather(*[generate_embeddings_background(video_id) for video_id in video_ids])
 
 # ===============================
 # PHASE 3: CONVERSATIONAL INTERFACE API ENDPOINTS
 # ===============================
 
 @app.post("/api/v1/chat/session", response_model=ChatSessionResponse)
-async def create_chat_session(request: ChatSessionCreate, db: Session = Depends(get_db)):
+async def create_chat_session(request: ChatSessionCreate, db: Session = Depends(get_request_db)):
     """Create a new chat session for a video"""
     if not PHASE3_TO_5_AVAILABLE or not conversation_manager:
         raise HTTPException(status_code=501, detail="Phase 3 conversational features not available")
     
     try:
-        video = db.query(Video).filter(Video.id == request.video_id).first()
-        if not video:
+        if not _video_exists(db, request.video_id):
             raise HTTPException(status_code=404, detail="Video not found")
         
         session = conversation_manager.create_session(db, request.video_id, request.title)
@@ -1043,7 +1653,7 @@ async def create_chat_session(request: ChatSessionCreate, db: Session = Depends(
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/v1/chat/message", response_model=ChatMessageResponse)
-async def send_chat_message(request: ChatMessageRequest, db: Session = Depends(get_db)):
+async def send_chat_message(request: ChatMessageRequest, db: Session = Depends(get_request_db)):
     """Send a message in a chat session and get AI response"""
     if not PHASE3_TO_5_AVAILABLE or not conversation_manager:
         raise HTTPException(status_code=501, detail="Phase 3 conversational features not available")
@@ -1065,8 +1675,30 @@ async def send_chat_message(request: ChatMessageRequest, db: Session = Depends(g
         logger.error(f"Error processing chat message: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/v1/chat/message/stream")
+async def stream_chat_message(request: ChatMessageRequest, db: Session = Depends(get_request_db)):
+    """Send a message in a chat session and stream the AI response as server-sent events"""
+    if not PHASE3_TO_5_AVAILABLE or not conversation_manager:
+        raise HTTPException(status_code=501, detail="Phase 3 conversational features not available")
+    
+    session = conversation_manager.get_session(db, request.session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Chat session not found")
+    
+    async def event_stream():
+        try:
+            async for event in conversation_manager.stream_enhanced_response(
+                db, request.session_id, request.message, session.video_id
+            ):
+                yield f"data: {json.dumps(event)}\n\n"
+        except Exception as e:
+            logger.error(f"Error streaming chat message: {e}")
+            yield f"data: {json.dumps({'type': 'error', 'detail': str(e)})}\n\n"
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
 @app.get("/api/v1/chat/session/{session_id}/history")
-async def get_chat_history(session_id: str, db: Session = Depends(get_db)):
+async def get_chat_history(session_id: str, db: Session = Depends(get_request_db)):
     """Get complete chat session history"""
     if not PHASE3_TO_5_AVAILABLE or not conversation_manager:
         raise HTTPException(status_code=501, detail="Phase 3 conversational features not available")
@@ -1085,7 +1717,7 @@ async def get_chat_history(session_id: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.delete("/api/v1/chat/session/{session_id}")
-async def close_chat_session(session_id: str, db: Session = Depends(get_db)):
+async def close_chat_session(session_id: str, db: Session = Depends(get_request_db)):
     """Close a chat session"""
     if not PHASE3_TO_5_AVAILABLE or not conversation_manager:
         raise HTTPException(status_code=501, detail="Phase 3 conversational features not available")
@@ -1107,15 +1739,14 @@ async def process_video_visual_content(
     video_id: int, 
     background_tasks: BackgroundTasks,
     confidence_threshold: float = 0.5,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_request_db)
 ):
     """Process video frames for object detection and scene classification"""
     if not PHASE3_TO_5_AVAILABLE:
         raise HTTPException(status_code=501, detail="Phase 4 visual search features not available")
     
     try:
-        video = db.query(Video).filter(Video.id == video_id).first()
-        if not video:
+        if not _video_exists(db, video_id):
             raise HTTPException(status_code=404, detail="Video not found")
         
         # Start background processing
@@ -1136,17 +1767,17 @@ async def process_video_visual_content(
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/v1/visual/search", response_model=VisualSearchResponse)
-async def visual_search(request: VisualSearchRequest, db: Session = Depends(get_db)):
+async def visual_search(request: VisualSearchRequest, db: Session = Depends(get_request_db)):
     """Search for visual content using natural language queries"""
     if not PHASE3_TO_5_AVAILABLE:
         raise HTTPException(status_code=501, detail="Phase 4 visual search features not available")
     
     try:
-        video = db.query(Video).filter(Video.id == request.video_id).first()
-        if not video:
+        if not _video_exists(db, request.video_id):
             raise HTTPException(status_code=404, detail="Video not found")
         
-        search_results = visual_search_engine.search_visual_content(
+        search_results = await _run_inference(
+            visual_search_engine.search_visual_content,
             db, request.video_id, request.query, request.confidence_threshold
         )
         
@@ -1166,17 +1797,16 @@ async def visual_search(request: VisualSearchRequest, db: Session = Depends(get_
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/v1/visual/{video_id}/timeline")
-async def get_visual_timeline(video_id: int, db: Session = Depends(get_db)):
+async def get_visual_timeline(video_id: int, db: Session = Depends(get_request_db)):
     """Get visual timeline showing detected objects and scenes"""
     if not PHASE3_TO_5_AVAILABLE:
         raise HTTPException(status_code=501, detail="Phase 4 visual search features not available")
     
     try:
-        video = db.query(Video).filter(Video.id == video_id).first()
-        if not video:
+        if not _video_exists(db, video_id):
             raise HTTPException(status_code=404, detail="Video not found")
         
-        timeline = visual_search_engine.get_visual_timeline(db, video_id)
+        timeline = await _run_inference(visual_search_engine.get_visual_timeline, db, video_id)
         return timeline
         
     except HTTPException:
@@ -1186,17 +1816,16 @@ async def get_visual_timeline(video_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/v1/visual/{video_id}/statistics")
-async def get_object_statistics(video_id: int, db: Session = Depends(get_db)):
+async def get_object_statistics(video_id: int, db: Session = Depends(get_request_db)):
     """Get statistics about detected objects in the video"""
     if not PHASE3_TO_5_AVAILABLE:
         raise HTTPException(status_code=501, detail="Phase 4 visual search features not available")
     
     try:
-        video = db.query(Video).filter(Video.id == video_id).first()
-        if not video:
+        if not _video_exists(db, video_id):
             raise HTTPException(status_code=404, detail="Video not found")
         
-        stats = visual_search_engine.get_object_statistics(db, video_id)
+        stats = await _run_inference(visual_search_engine.get_object_statistics, db, video_id)
         return stats
         
     except HTTPException:
@@ -1210,17 +1839,16 @@ async def get_object_statistics(video_id: int, db: Session = Depends(get_db)):
 # ===============================
 
 @app.post("/api/v1/content/analyze/{video_id}", response_model=TopicSegmentResponse)
-async def analyze_video_content(video_id: int, db: Session = Depends(get_db)):
+async def analyze_video_content(video_id: int, db: Session = Depends(get_request_db)):
     """Analyze video content to create topic segments"""
     if not PHASE3_TO_5_AVAILABLE:
         raise HTTPException(status_code=501, detail="Phase 5 content analysis features not available")
     
     try:
-        video = db.query(Video).filter(Video.id == video_id).first()
-        if not video:
+        if not _video_exists(db, video_id):
             raise HTTPException(status_code=404, detail="Video not found")
         
-        result = content_segmentation_engine.create_topic_segments(db, video_id)
+        result = await _run_inference(content_segmentation_engine.create_topic_segments, db, video_id)
         
         return TopicSegmentResponse(**result)
         
@@ -1231,17 +1859,16 @@ async def analyze_video_content(video_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/v1/content/outline/{video_id}", response_model=ContentOutlineResponse)
-async def generate_content_outline(video_id: int, db: Session = Depends(get_db)):
+async def generate_content_outline(video_id: int, db: Session = Depends(get_request_db)):
     """Generate hierarchical content outline for the video"""
     if not PHASE3_TO_5_AVAILABLE:
         raise HTTPException(status_code=501, detail="Phase 5 content analysis features not available")
     
     try:
-        video = db.query(Video).filter(Video.id == video_id).first()
-        if not video:
+        if not _video_exists(db, video_id):
             raise HTTPException(status_code=404, detail="Video not found")
         
-        result = content_segmentation_engine.generate_content_outline(db, video_id)
+        result = await _run_inference(content_segmentation_engine.generate_content_outline, db, video_id)
         
         return ContentOutlineResponse(**result)
         
@@ -1252,17 +1879,16 @@ async def generate_content_outline(video_id: int, db: Session = Depends(get_db))
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/v1/navigation/events/{video_id}")
-async def create_navigation_events(video_id: int, db: Session = Depends(get_db)):
+async def create_navigation_events(video_id: int, db: Session = Depends(get_request_db)):
     """Create navigation events for enhanced video navigation"""
     if not PHASE3_TO_5_AVAILABLE:
         raise HTTPException(status_code=501, detail="Phase 5 navigation features not available")
     
     try:
-        video = db.query(Video).filter(Video.id == video_id).first()
-        if not video:
+        if not _video_exists(db, video_id):
             raise HTTPException(status_code=404, detail="Video not found")
         
-        result = content_segmentation_engine.create_navigation_events(db, video_id)
+        result = await _run_inference(content_segmentation_engine.create_navigation_events, db, video_id)
         
         return result
         
@@ -1273,17 +1899,16 @@ async def create_navigation_events(video_id: int, db: Session = Depends(get_db))
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/v1/navigation/{video_id}")
-async def get_navigation_data(video_id: int, db: Session = Depends(get_db)):
+async def get_navigation_data(video_id: int, db: Session = Depends(get_request_db)):
     """Get comprehensive navigation data for a video"""
     if not PHASE3_TO_5_AVAILABLE:
         raise HTTPException(status_code=501, detail="Phase 5 navigation features not available")
     
     try:
-        video = db.query(Video).filter(Video.id == video_id).first()
-        if not video:
+        if not _video_exists(db, video_id):
             raise HTTPException(status_code=404, detail="Video not found")
         
-        navigation_data = content_segmentation_engine.get_video_navigation_data(db, video_id)
+        navigation_data = await _run_inference(content_segmentation_engine.get_video_navigation_data, db, video_id)
         
         return navigation_data
         
@@ -1296,19 +1921,27 @@ async def get_navigation_data(video_id: int, db: Session = Depends(get_db)):
 # Background processing functions for Phase 4
 async def process_visual_content_background(video_id: int, confidence_threshold: float):
     """Background task to process visual content of a video"""
-    db = next(get_db())
-    try:
-        logger.info(f"Starting visual content processing for video {video_id}")
-        
-        result = visual_search_engine.process_video_frames(db, video_id, confidence_threshold)
-        
-        logger.info(f"Completed visual content processing for video {video_id}: {result}")
-        
-    except Exception as e:
-        logger.error(f"Error in visual content processing for video {video_id}: {e}")
-    finally:
-        db.close()
+    with SessionLocal(expire_on_commit=False) as db:
+        try:
+            logger.info(f"Starting visual content processing for video {video_id}")
+            
+            result = await _run_inference(
+                visual_search_engine.process_video_frames, db, video_id, confidence_threshold
+            )
+            
+            logger.info(f"Completed visual content processing for video {video_id}: {result}")
+            
+        except Exception as e:
+            logger.error(f"Error in visual content processing for video {video_id}: {e}")
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    uvicorn.run(
+        "backend.api.main:app",
+        host=os.getenv("API_HOST", "0.0.0.0"),
+        port=int(os.getenv("API_PORT", "8000")),
+        # uvloop is not available on Windows
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        workers=int(os.getenv("API_WORKERS", "1"))
+    )
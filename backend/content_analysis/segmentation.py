@@ -171,22 +171,20 @@ class ContentSegmentationEngine:
         if not topic_analysis:
             return {'segments_created': 0, 'error': 'No transcript data found'}
         
-        segments_created = 0
-        
-        # Store topic segments in database
-        for i, segment_data in enumerate(topic_analysis):
-            topic_segment = TopicSegment(
-                video_id=video_id,
-                start_time=segment_data['start_time'],
-                end_time=segment_data['end_time'],
-                topic_title=segment_data['topic_summary'],
-                topic_summary=self._create_detailed_summary(segment_data['texts']),
-                keywords=segment_data['keywords'],
-                importance_score=segment_data['importance_score']
-            )
-            
-            db.add(topic_segment)
-            segments_created += 1
+        # Store topic segments in database with one multi-row INSERT
+        db.bulk_insert_mappings(TopicSegment, [
+            {
+                'video_id': video_id,
+                'start_time': segment_data['start_time'],
+                'end_time': segment_data['end_time'],
+                'topic_title': segment_data['topic_summary'],
+                'topic_summary': self._create_detailed_summary(segment_data['texts']),
+                'keywords': segment_data['keywords'],
+                'importance_score': segment_data['importance_score']
+            }
+            for segment_data in topic_analysis
+        ])
+        segments_created = len(topic_analysis)
         
         db.commit()
         
@@ -336,7 +334,8 @@ class ContentSegmentationEngine:
         """
         Create navigation events for topic changes, scene changes, etc.
         """
-        events_created = 0
+        # Events are collected and written with one multi-row INSERT
+        nav_events = []
         
         # Create events from topic segments
         segments = db.query(TopicSegment).filter(
@@ -345,19 +344,17 @@ class ContentSegmentationEngine:
         
         for segment in segments:
             # Topic change event
-            nav_event = NavigationEvent(
-                video_id=video_id,
-                event_type='topic_change',
-                timestamp=segment.start_time,
-                description=f"New topic: {segment.topic_title}",
-                metadata={
+            nav_events.append({
+                'video_id': video_id,
+                'event_type': 'topic_change',
+                'timestamp': segment.start_time,
+                'description': f"New topic: {segment.topic_title}",
+                'event_metadata': {
                     'topic_title': segment.topic_title,
                     'importance_score': segment.importance_score,
                     'keywords': segment.keywords or []
                 }
-            )
-            db.add(nav_event)
-            events_created += 1
+            })
         
         # Create events from transcript analysis (speaker changes, etc.)
         transcript_chunks = db.query(TranscriptChunk).filter(
@@ -367,18 +364,19 @@ class ContentSegmentationEngine:
         current_speaker = None
         for chunk in transcript_chunks:
             if chunk.speaker and chunk.speaker != current_speaker:
-                nav_event = NavigationEvent(
-                    video_id=video_id,
-                    event_type='speaker_change',
-                    timestamp=chunk.start_time,
-                    description=f"Speaker: {chunk.speaker}",
-                    metadata={'speaker': chunk.speaker}
-                )
-                db.add(nav_event)
+                nav_events.append({
+                    'video_id': video_id,
+                    'event_type': 'speaker_change',
+                    'timestamp': chunk.start_time,
+                    'description': f"Speaker: {chunk.speaker}",
+                    'event_metadata': {'speaker': chunk.speaker}
+                })
                 current_speaker = chunk.speaker
-                events_created += 1
         
+        if nav_events:
+            db.bulk_insert_mappings(NavigationEvent, nav_events)
         db.commit()
+        events_created = len(nav_events)
         
         return {
             'events_created': events_created,
@@ -1,11 +1,13 @@
 # Conversation Manager for Phase 3: Context-Aware Chat System
 
 import uuid
+import asyncio
 from datetime import datetime
-from typing import List, Dict, Optional, Tuple, Any
+from typing import List, Dict, Optional, Tuple, Any, AsyncIterator
 from sqlalchemy.orm import Session
 from backend.database.models import ChatSession, ChatMessage, ConversationContext, Video, TranscriptChunk, VideoFrame
 from backend.embedding_engine.rag import MultimodalRAG
+from backend.embedding_engine.semantic_cache import SemanticCache
 import json
 import re
 
@@ -18,6 +20,7 @@ class ConversationManager:
     def __init__(self, rag_system: MultimodalRAG):
         self.rag_system = rag_system
         self.max_context_messages = 10  # Keep last 10 messages for context
+        self.response_cache = SemanticCache(similarity_threshold=0.95)
         
     def create_session(self, db: Session, video_id: int, title: str = None) -> ChatSession:
         """Create a new chat session for a video."""
@@ -82,66 +85,43 @@ class ConversationManager:
     async def find_relevant_segments(self, db: Session, video_id: int, query: str, 
                                      context_messages: List[Dict]) -> List[Dict]:
         """Find relevant transcript segments and frames for the query."""
-        # Use RAG system to find relevant content
-        rag_results = await self.rag_system.process_query(query, video_ids=[video_id])
-        
-        # Extract timestamps from context messages
-        context_timestamps = []
-        for msg in context_messages:
-            if msg.get('timestamp_references'):
-                context_timestamps.extend(msg['timestamp_references'])
+        # Use RAG retrieval only; generation happens separately on the enhanced query
+        context_items = await self.rag_system.retrieve(query, video_ids=[video_id])
         
         # Combine RAG results with context
         relevant_segments = []
-        for result in rag_results.get('transcript_results', []):
-            segment_info = {
-                'text': result['text'],
-                'start_time': result['start_time'],
-                'end_time': result['end_time'],
-                'confidence': result.get('confidence', 0.0),
-                'source': 'transcript'
-            }
-            relevant_segments.append(segment_info)
-        
-        # Add frame results
-        for result in rag_results.get('frame_results', []):
-            frame_info = {
-                'frame_path': result['frame_path'],
-                'timestamp': result['timestamp'],
-                'confidence': result.get('confidence', 0.0),
-                'source': 'frame'
-            }
-            relevant_segments.append(frame_info)
+        for item in context_items:
+            if item.get('context_type') == 'transcript':
+                relevant_segments.append({
+                    'text': item['text'],
+                    'start_time': item['start_time'],
+                    'end_time': item['end_time'],
+                    'confidence': item.get('similarity', 0.0),
+                    'source': 'transcript'
+                })
+            elif item.get('context_type') == 'frame':
+                relevant_segments.append({
+                    'frame_path': item['frame_path'],
+                    'timestamp': item['timestamp'],
+                    'confidence': item.get('similarity', 0.0),
+                    'source': 'frame'
+                })
         
         return relevant_segments
 
-    async def generate_enhanced_response(self, db: Session, session_id: str, user_query: str, 
-                                         video_id: int) -> Dict[str, Any]:
-        """Generate a context-aware response with multimedia enhancements."""
-        session = self.get_session(db, session_id)
-        if not session:
-            raise ValueError(f"Session {session_id} not found")
-        
-        # Get conversation context
-        context_messages = self.get_conversation_context(db, session.id)
-        
-        # Find relevant segments
-        relevant_segments = await self.find_relevant_segments(db, video_id, user_query, context_messages)
-        
-        # Extract timestamp references from user query
-        timestamp_refs = self.extract_timestamp_references(user_query)
-
-        # Generate response using RAG system with context
-        context_text = "\n".join([f"{msg['role']}: {msg['content']}" for msg in context_messages[-5:]])
-        enhanced_query = f"Context: {context_text}\n\nUser Query: {user_query}"
-        
-        # Use await for the async method
-        rag_response = await self.rag_system.process_query(enhanced_query, video_ids=[video_id])
-        
-        # Format response with enhancements
-        response_content = rag_response.get('response', '')
-        
-        # Add timestamp citations
+    async def _embed_query(self, query: str) -> Optional[Any]:
+        """Embed a query for the response cache, or return None if embeddings are unavailable."""
+        try:
+            return await self.rag_system.embedding_engine.embed_query(query)
+        except Exception:
+            return None
+    
+    def _format_history(self, context_messages: List[Dict]) -> str:
+        """Render the most recent conversation turns for the prompt."""
+        return "\n".join([f"{msg['role']}: {msg['content']}" for msg in context_messages[-5:]])
+    
+    def _build_citations(self, relevant_segments: List[Dict]) -> Tuple[List[Dict], List[Dict], float]:
+        """Turn retrieved segments into timestamp citations, frame references and a confidence score."""
         cited_timestamps = []
         frame_references = []
         
@@ -163,6 +143,29 @@ class ConversationManager:
         confidence_scores = [seg['confidence'] for seg in relevant_segments]
         overall_confidence = sum(confidence_scores) / len(confidence_scores) if confidence_scores else 0.0
         
+        return cited_timestamps, frame_references, overall_confidence
+    
+    async def _generate_response_content(self, db: Session, session_id: str, video_id: int, user_query: str,
+                                         context_messages: List[Dict]) -> Tuple[str, List[Dict], List[Dict], float]:
+        """Run retrieval and generation for a query, returning the response and its citations."""
+        history = self._format_history(context_messages)
+        
+        # Citation retrieval does not depend on the generated answer, so overlap the two
+        relevant_segments, rag_response = await asyncio.gather(
+            self.find_relevant_segments(db, video_id, user_query, context_messages),
+            self.rag_system.process_query(user_query, video_ids=[video_id], history=history,
+                                          session_id=session_id)
+        )
+        
+        response_content = rag_response.get('response', '')
+        cited_timestamps, frame_references, overall_confidence = self._build_citations(relevant_segments)
+        
+        return response_content, cited_timestamps, frame_references, overall_confidence
+
+    def _save_exchange(self, db: Session, session: ChatSession, user_query: str, timestamp_refs: List[float],
+                       response_content: str, cited_timestamps: List[Dict], frame_references: List[Dict],
+                       overall_confidence: float) -> Dict[str, Any]:
+        """Persist a user query and its assistant response, returning the API payload."""
         # Save user message
         user_message = ChatMessage(
             session_id=session.id,
@@ -184,7 +187,8 @@ class ConversationManager:
             created_at=datetime.utcnow()
         )
         db.add(assistant_message)
-          # Update conversation context
+        
+        # Update conversation context
         self.update_conversation_context(db, session.id, user_query, response_content, 
                                        cited_timestamps, frame_references)
         
@@ -196,6 +200,94 @@ class ConversationManager:
             'confidence': overall_confidence,
             'timestamp_citations': cited_timestamps
         }
+
+    async def generate_enhanced_response(self, db: Session, session_id: str, user_query: str, 
+                                         video_id: int) -> Dict[str, Any]:
+        """Generate a context-aware response with multimedia enhancements."""
+        session = self.get_session(db, session_id)
+        if not session:
+            raise ValueError(f"Session {session_id} not found")
+        
+        # Get conversation context
+        context_messages = self.get_conversation_context(db, session.id)
+        
+        # Extract timestamp references from user query
+        timestamp_refs = self.extract_timestamp_references(user_query)
+        
+        # Reuse the answer to a near-identical question about the same video. Only
+        # opening questions are cached: a follow-up's answer depends on the
+        # session's history, which another session doesn't share
+        cache_scope = (video_id,)
+        query_embedding = await self._embed_query(user_query) if not context_messages else None
+        cached = self.response_cache.lookup(cache_scope, query_embedding) if query_embedding is not None else None
+        
+        if cached:
+            response_content, cited_timestamps, frame_references, overall_confidence = cached
+        else:
+            response_content, cited_timestamps, frame_references, overall_confidence = \
+                await self._generate_response_content(db, session_id, video_id, user_query, context_messages)
+            if query_embedding is not None:
+                self.response_cache.store(
+                    cache_scope, query_embedding,
+                    (response_content, cited_timestamps, frame_references, overall_confidence)
+                )
+        
+        return self._save_exchange(db, session, user_query, timestamp_refs, response_content,
+                                   cited_timestamps, frame_references, overall_confidence)
+
+    async def stream_enhanced_response(self, db: Session, session_id: str, user_query: str,
+                                       video_id: int) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream a context-aware response as events.
+        
+        Yields {'type': 'token', 'content': ...} for each generated chunk and finishes with
+        {'type': 'done', ...} carrying the same payload as generate_enhanced_response.
+        """
+        session = self.get_session(db, session_id)
+        if not session:
+            raise ValueError(f"Session {session_id} not found")
+        
+        context_messages = self.get_conversation_context(db, session.id)
+        timestamp_refs = self.extract_timestamp_references(user_query)
+        
+        # As in generate_enhanced_response, only opening questions use the cache
+        cache_scope = (video_id,)
+        query_embedding = await self._embed_query(user_query) if not context_messages else None
+        cached = self.response_cache.lookup(cache_scope, query_embedding) if query_embedding is not None else None
+        
+        if cached:
+            response_content, cited_timestamps, frame_references, overall_confidence = cached
+            yield {'type': 'token', 'content': response_content}
+        else:
+            # Citation retrieval runs in the background while the answer is generated
+            segments_task = asyncio.create_task(
+                self.find_relevant_segments(db, video_id, user_query, context_messages)
+            )
+            try:
+                history = self._format_history(context_messages)
+                context_items = await self.rag_system.retrieve(user_query, video_ids=[video_id], history=history)
+                
+                response_parts = []
+                async for chunk in self.rag_system.stream_response(user_query, context_items, history,
+                                                                   session_id=session_id):
+                    response_parts.append(chunk)
+                    yield {'type': 'token', 'content': chunk}
+                
+                relevant_segments = await segments_task
+            finally:
+                segments_task.cancel()
+            
+            response_content = "".join(response_parts)
+            cited_timestamps, frame_references, overall_confidence = self._build_citations(relevant_segments)
+            if query_embedding is not None:
+                self.response_cache.store(
+                    cache_scope, query_embedding,
+                    (response_content, cited_timestamps, frame_references, overall_confidence)
+                )
+        
+        result = self._save_exchange(db, session, user_query, timestamp_refs, response_content,
+                                     cited_timestamps, frame_references, overall_confidence)
+        yield {'type': 'done', **result}
     
     def update_conversation_context(self, db: Session, session_id: int, user_query: str, 
                                   response: str, timestamps: List[Dict], frames: List[Dict]):
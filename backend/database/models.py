@@ -1,8 +1,9 @@
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, Float, Boolean, JSON, ForeignKey
+from sqlalchemy import create_engine, event, Column, Integer, String, Text, DateTime, Float, Boolean, JSON, ForeignKey, LargeBinary, Index, inspect, text
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.orm import sessionmaker, relationship, deferred
 from datetime import datetime
 import os
+import asyncio
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -28,6 +29,9 @@ class Video(Base):
     processed = Column(Boolean, default=False)
     transcript_generated = Column(Boolean, default=False)
     frames_extracted = Column(Boolean, default=False)
+    # Normalized mean of the transcript embeddings (float32 bytes), used for
+    # video-to-video similarity; deferred so ordinary loads don't fetch it
+    avg_embedding = deferred(Column(LargeBinary, nullable=True))
     
     # Relationships
     transcript_chunks = relationship("TranscriptChunk", back_populates="video")
@@ -50,6 +54,9 @@ class TranscriptChunk(Base):
     
     # Relationships
     video = relationship("Video", back_populates="transcript_chunks")
+    
+    # Backs per-video listings ordered by time
+    __table_args__ = (Index("ix_transcript_chunks_video_id_start_time", "video_id", "start_time"),)
 
 class VideoFrame(Base):
     __tablename__ = "video_frames"
@@ -66,6 +73,9 @@ class VideoFrame(Base):
     # Relationships
     video = relationship("Video", back_populates="frames")
     detected_objects = relationship("ObjectDetection", back_populates="frame")
+    
+    # Backs per-video listings ordered by time
+    __table_args__ = (Index("ix_video_frames_video_id_timestamp", "video_id", "timestamp"),)
 
 # Phase 3: Conversational Interface Models
 
@@ -190,11 +200,45 @@ class NavigationEvent(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
 # Database setup
-engine = create_engine(DATABASE_URL)
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+
+engine_options = {
+    "query_cache_size": int(os.getenv("DB_QUERY_CACHE_SIZE", "1200")),
+    "pool_pre_ping": True,
+}
+if not IS_SQLITE:
+    engine_options.update(
+        pool_size=int(os.getenv("DB_POOL_SIZE", "20")),
+        max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "30")),
+        pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "3600")),
+    )
+
+engine = create_engine(DATABASE_URL, **engine_options)
+
+if IS_SQLITE:
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        """Use WAL so readers don't block on background writes"""
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.close()
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 def create_tables():
     Base.metadata.create_all(bind=engine)
+    
+    # create_all doesn't alter existing tables; add columns introduced since
+    columns = {column["name"] for column in inspect(engine).get_columns("videos")}
+    if "avg_embedding" not in columns:
+        column_type = LargeBinary().compile(dialect=engine.dialect)
+        with engine.begin() as connection:
+            connection.execute(text(f"ALTER TABLE videos ADD COLUMN avg_embedding {column_type}"))
+    
+    # Nor does it add indexes to existing tables
+    for table in (TranscriptChunk.__table__, VideoFrame.__table__):
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
 
 def get_db():
     db = SessionLocal()
@@ -202,3 +246,20 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_request_db():
+    """
+    FastAPI dependency yielding a session without the threadpool hop a sync
+    generator dependency costs. Creating a session does no I/O; closing it
+    returns the connection to the pool, which may issue a rollback, so that
+    part still runs in a worker thread.
+    """
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        await asyncio.to_thread(db.close)
+
+if __name__ == "__main__":
+    create_tables()
+    print("Database tables created")
@@ -3,5 +3,6 @@ Embedding Engine for MultiModel Video Processor Phase 2
 """
 
 from .engine import EmbeddingEngine, get_embedding_engine
+from .semantic_cache import SemanticCache
 
-__all__ = ["EmbeddingEngine", "get_embedding_engine"]
+__all__ = ["EmbeddingEngine", "get_embedding_engine", "SemanticCache"]
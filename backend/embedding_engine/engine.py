@@ -4,6 +4,7 @@ Handles generation and storage of embeddings for frames and text
 """
 
 import os
+import time
 import numpy as np
 from typing import List, Dict, Any, Optional, Tuple
 import logging
@@ -11,7 +12,9 @@ from pathlib import Path
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
 import pickle
+import hashlib
 import warnings
+from collections import OrderedDict
 
 # Suppress Pydantic warnings from transformers
 warnings.filterwarnings("ignore", message="Field.*has conflict with protected namespace.*")
@@ -36,8 +39,42 @@ except ImportError:
     LANCEDB_AVAILABLE = False
     logging.warning("LanceDB not available. Install lancedb for vector storage.")
 
+# Similarity index for file-based storage
+try:
+    import faiss
+    FAISS_AVAILABLE = True
+except ImportError:
+    FAISS_AVAILABLE = False
+    logging.warning("FAISS not available. File-based search will use NumPy.")
+
 from ..database.models import Video, TranscriptChunk, VideoFrame, SessionLocal
 
+def _l2_normalize(embeddings: np.ndarray) -> np.ndarray:
+    """
+    Scale each row of a float32 array to unit length, in place, so inner
+    product equals cosine similarity
+    """
+    if FAISS_AVAILABLE and embeddings.ndim == 2:
+        # Multithreaded C++ kernel, no temporaries
+        faiss.normalize_L2(embeddings)
+        return embeddings
+    
+    norms = np.sqrt(np.einsum("...i,...i->...", embeddings, embeddings))[..., np.newaxis]
+    np.maximum(norms, 1e-12, out=norms)
+    embeddings /= norms
+    return embeddings
+
+def _quantize_int8(embeddings: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Symmetric per-vector int8 quantization: returns the codes and the float32
+    scale of each row, so that codes * scale approximates the input
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32).reshape(len(embeddings), -1)
+    scales = np.abs(embeddings).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.rint(embeddings / scales[:, np.newaxis]).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
 class EmbeddingEngine:
     """
     Main engine for generating and managing embeddings
@@ -53,6 +90,11 @@ class EmbeddingEngine:
         self.vision_model_name = vision_model_name or os.getenv("VISION_EMBEDDING_MODEL", "openai/clip-vit-base-patch32")
         self.vector_db_path = Path(vector_db_path or os.getenv("VECTOR_DB_PATH", "./vector_db"))
         self.vector_db_path.mkdir(exist_ok=True)
+        # "int8" scalar-quantizes in-memory indexes; "float32" keeps full precision
+        self.index_quantization = os.getenv("EMBEDDING_INDEX_QUANTIZATION", "int8").lower()
+        # Embedding files with at least this many vectors get an HNSW graph
+        # index, searched in roughly log(N) instead of a full scan
+        self.hnsw_min_vectors = int(os.getenv("EMBEDDING_HNSW_MIN_VECTORS", "50000"))
         
         # Initialize models
         self.text_model = None
@@ -65,6 +107,32 @@ class EmbeddingEngine:
         # Thread pool for CPU-intensive tasks
         self.executor = ThreadPoolExecutor(max_workers=4)
         
+        # Items per model forward pass when indexing a video
+        self.text_batch_size = int(os.getenv("TEXT_EMBEDDING_BATCH_SIZE", "64"))
+        self.frame_batch_size = int(os.getenv("FRAME_EMBEDDING_BATCH_SIZE", "32"))
+        
+        # In-memory similarity indexes for embedding files, keyed by path
+        self._file_indexes: Dict[Path, Tuple[float, List[Dict], Any]] = {}
+        
+        # (expiry, video ids, index, embeddings) over per-video average embeddings;
+        # rebuilt after a local update or once it expires, to pick up other workers
+        self._video_index: Optional[Tuple[float, np.ndarray, Any, np.ndarray]] = None
+        self.video_index_ttl = 60.0
+        
+        # LRU of query embeddings (float16 bytes) keyed by model and normalized text
+        self.query_cache_size = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "1024"))
+        self._query_cache: "OrderedDict[str, bytes]" = OrderedDict()
+        
+        # Queries waiting to be embedded together in the next micro-batch
+        self.query_batch_window = 0.005
+        self.query_batch_max = int(os.getenv("QUERY_EMBEDDING_BATCH_SIZE", "64"))
+        
+        # Transcript chunks of videos being indexed at the same time, encoded
+        # together so the model sees full batches instead of several partial ones
+        self.chunk_batch_window = 0.02
+        self._pending_chunks: List[Tuple[List[str], asyncio.Future]] = []
+        self._pending_queries: Dict[str, Tuple[str, asyncio.Future]] = {}
+        
         # Setup logging
         self.logger = logging.getLogger(__name__)
         
@@ -127,18 +195,106 @@ class EmbeddingEngine:
         loop = asyncio.get_event_loop()
         embeddings = await loop.run_in_executor(
             self.executor,
-            self.text_model.encode,
-            texts
+            lambda: self.text_model.encode(texts, batch_size=self.text_batch_size)
         )
         
         return embeddings
     
+    def _query_cache_key(self, text: str) -> str:
+        digest = hashlib.sha256(text.strip().lower().encode("utf-8")).hexdigest()
+        return f"emb:{self.text_model_name}:{digest}"
+    
+    async def embed_query(self, text: str) -> np.ndarray:
+        """
+        Embed a single search query, reusing cached vectors and batching
+        queries that arrive within a few milliseconds into one encode call
+        """
+        key = self._query_cache_key(text)
+        
+        cached = self._query_cache.get(key)
+        if cached is not None:
+            self._query_cache.move_to_end(key)
+            return np.frombuffer(cached, dtype=np.float16).astype(np.float32)
+        
+        pending = self._pending_queries.get(key)
+        if pending is None:
+            loop = asyncio.get_running_loop()
+            if not self._pending_queries:
+                loop.call_later(self.query_batch_window,
+                                lambda: asyncio.ensure_future(self._flush_query_batch()))
+            pending = (text, loop.create_future())
+            self._pending_queries[key] = pending
+            if len(self._pending_queries) >= self.query_batch_max:
+                # A full batch doesn't wait for the rest of the window
+                asyncio.ensure_future(self._flush_query_batch())
+        
+        embedding = await asyncio.shield(pending[1])
+        return embedding.copy()
+    
+    async def _flush_query_batch(self):
+        """Embed every pending query in one call and resolve their futures"""
+        batch, self._pending_queries = self._pending_queries, {}
+        if not batch:
+            return
+        
+        keys = list(batch.keys())
+        try:
+            embeddings = await self.generate_text_embeddings([batch[key][0] for key in keys])
+        except Exception as e:
+            for key in keys:
+                batch[key][1].set_exception(e)
+            return
+        
+        for key, embedding in zip(keys, embeddings):
+            embedding = np.asarray(embedding, dtype=np.float32)
+            self._query_cache[key] = embedding.astype(np.float16).tobytes()
+            batch[key][1].set_result(embedding)
+        
+        while len(self._query_cache) > self.query_cache_size:
+            self._query_cache.popitem(last=False)
+    
+    async def embed_chunks(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed a video's transcript chunks, coalescing with other videos
+        indexed within the same short window into one encode call
+        """
+        loop = asyncio.get_running_loop()
+        if not self._pending_chunks:
+            loop.call_later(self.chunk_batch_window,
+                            lambda: asyncio.ensure_future(self._flush_chunk_batch()))
+        future = loop.create_future()
+        self._pending_chunks.append((texts, future))
+        
+        if sum(len(pending[0]) for pending in self._pending_chunks) >= self.text_batch_size:
+            # Enough for a full batch already
+            asyncio.ensure_future(self._flush_chunk_batch())
+        
+        return await asyncio.shield(future)
+    
+    async def _flush_chunk_batch(self):
+        """Embed every pending video's chunks in one call and hand each its slice"""
+        batch, self._pending_chunks = self._pending_chunks, []
+        if not batch:
+            return
+        
+        try:
+            embeddings = await self.generate_text_embeddings([text for texts, _ in batch for text in texts])
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        
+        start = 0
+        for texts, future in batch:
+            future.set_result(embeddings[start:start + len(texts)])
+            start += len(texts)
+    
     async def generate_frame_embeddings(self, image_paths: List[str]) -> np.ndarray:
         """Generate embeddings for video frames"""
         if not self.vision_model or not self.vision_processor:
             raise ValueError("Vision model not initialized")
         
-        def process_images(paths):
+        def load_images(paths):
             images = []
             for path in paths:
                 try:
@@ -149,10 +305,9 @@ class EmbeddingEngine:
                         self.logger.warning(f"Image not found: {path}")
                 except Exception as e:
                     self.logger.error(f"Error loading image {path}: {e}")
-            
-            if not images:
-                return np.array([])
-            
+            return images
+        
+        def embed_images(images):
             # Process images and get embeddings
             inputs = self.vision_processor(images=images, return_tensors="pt", padding=True)
             
@@ -163,10 +318,28 @@ class EmbeddingEngine:
             
             return image_features.cpu().numpy()
         
+        # Embed in fixed-size batches so memory stays bounded, decoding the
+        # next batch of images while the model runs on the current one
+        batches = [image_paths[i:i + self.frame_batch_size]
+                   for i in range(0, len(image_paths), self.frame_batch_size)]
+        if not batches:
+            return np.array([])
+        
         loop = asyncio.get_event_loop()
-        embeddings = await loop.run_in_executor(self.executor, process_images, image_paths)
+        results = []
+        next_images = loop.run_in_executor(self.executor, load_images, batches[0])
         
-        return embeddings
+        for i in range(len(batches)):
+            images = await next_images
+            if i + 1 < len(batches):
+                next_images = loop.run_in_executor(self.executor, load_images, batches[i + 1])
+            if images:
+                results.append(await loop.run_in_executor(self.executor, embed_images, images))
+        
+        if not results:
+            return np.array([])
+        
+        return np.concatenate(results)
     
     async def store_text_embeddings(self, video_id: int, transcript_chunks: List[Dict], embeddings: np.ndarray):
         """Store text embeddings in vector database"""
@@ -242,9 +415,13 @@ class EmbeddingEngine:
         
         data = {
             "items": items,
-            "embeddings": embeddings,
             "timestamp": asyncio.get_event_loop().time()
         }
+        if self.index_quantization == "int8":
+            # A quarter of the float32 size on disk and when loading
+            data["embeddings_int8"], data["scales"] = _quantize_int8(embeddings)
+        else:
+            data["embeddings"] = embeddings
         
         def save_pickle():
             with open(file_path, 'wb') as f:
@@ -252,6 +429,7 @@ class EmbeddingEngine:
         
         loop = asyncio.get_event_loop()
         await loop.run_in_executor(self.executor, save_pickle)
+        self._file_indexes.pop(file_path, None)
         
         self.logger.info(f"Stored embeddings to file: {file_path}")
     
@@ -265,7 +443,7 @@ class EmbeddingEngine:
         
         Args:
             query_embedding: The query embedding vector
-            content_type: "text", "frame", or "both"
+            content_type: "text", "frame" (or "visual"), or "both"
             limit: Maximum number of results
             video_id: Limit search to specific video (optional)
         """
@@ -279,7 +457,7 @@ class EmbeddingEngine:
                 text_results = await self._search_table("text_embeddings", query_embedding, limit, video_id)
                 results.extend(text_results)
             
-            if content_type in ["frame", "both"]:
+            if content_type in ["frame", "visual", "both"]:
                 frame_results = await self._search_table("frame_embeddings", query_embedding, limit, video_id)
                 results.extend(frame_results)
             
@@ -299,42 +477,152 @@ class EmbeddingEngine:
         
         table = self.db.open_table(table_name)
         
-        # Perform vector search
-        results = table.search(query_embedding.tolist()).limit(limit).to_list()
+        # The video filter is applied after the vector search, so over-fetch
+        # to still return up to `limit` matches from that video
+        fetch_limit = limit * 3 if video_id else limit
+        results = table.search(query_embedding.tolist()).limit(fetch_limit).to_list()
         
         # Filter by video_id if specified
         if video_id:
             results = [r for r in results if r.get("video_id") == video_id]
         
-        return results
+        # Hits come back with their stored vectors, which callers never use
+        # and which dominate the size of a response
+        return [
+            {key: value for key, value in r.items() if key not in ("embedding", "vector")}
+            for r in results[:limit]
+        ]
+    
+    async def preload_indexes(self):
+        """
+        Load the similarity index of every embedding file, so the first search of
+        each video doesn't pay for unpickling and building (or reading) its index
+        """
+        if self.db is not None:
+            return
+        
+        loop = asyncio.get_event_loop()
+        embedding_files = list(self.vector_db_path.glob("*_embeddings.pkl"))
+        results = await asyncio.gather(*[
+            loop.run_in_executor(self.executor, self._load_file_index, file_path)
+            for file_path in embedding_files
+        ], return_exceptions=True)
+        
+        for file_path, result in zip(embedding_files, results):
+            if isinstance(result, Exception):
+                self.logger.warning(f"Failed to preload index for {file_path.name}: {result}")
+        self.logger.info(f"Preloaded {len(embedding_files)} embedding indexes")
+    
+    def _load_file_index(self, file_path: Path) -> Tuple[List[Dict], Any]:
+        """Load an embedding file and build (or reuse) its similarity index"""
+        mtime = file_path.stat().st_mtime
+        cached = self._file_indexes.get(file_path)
+        if cached and cached[0] == mtime:
+            return cached[1], cached[2]
+        
+        with open(file_path, 'rb') as f:
+            data = pickle.load(f)
+        
+        items = data["items"]
+        if "embeddings_int8" in data:
+            embeddings = data["embeddings_int8"].astype(np.float32) * data["scales"][:, np.newaxis]
+        else:
+            embeddings = np.ascontiguousarray(data["embeddings"], dtype=np.float32)
+        
+        index = None
+        if embeddings.ndim == 2 and embeddings.shape[0] > 0:
+            _l2_normalize(embeddings)
+            if FAISS_AVAILABLE and embeddings.shape[0] >= self.hnsw_min_vectors:
+                index = self._load_hnsw_index(file_path, mtime, embeddings)
+            elif FAISS_AVAILABLE:
+                index = self._build_faiss_index(embeddings)
+            else:
+                index = embeddings
+        
+        self._file_indexes[file_path] = (mtime, items, index)
+        return items, index
+    
+    def _load_hnsw_index(self, file_path: Path, mtime: float, embeddings: np.ndarray) -> Any:
+        """
+        HNSW index for a large embedding file. Building the graph is costly, so it
+        is saved next to the file and reused until the file is rewritten
+        """
+        index_path = file_path.with_suffix(".hnsw")
+        if index_path.exists() and index_path.stat().st_mtime >= mtime:
+            index = faiss.read_index(str(index_path))
+        else:
+            index = faiss.IndexHNSWFlat(embeddings.shape[1], 32, faiss.METRIC_INNER_PRODUCT)
+            index.hnsw.efConstruction = 64
+            index.add(embeddings)
+            faiss.write_index(index, str(index_path))
+        
+        index.hnsw.efSearch = 128
+        return index
+    
+    def _build_faiss_index(self, embeddings: np.ndarray) -> Any:
+        """Build an inner-product FAISS index, int8 scalar-quantized unless disabled"""
+        dimension = embeddings.shape[1]
+        
+        if self.index_quantization == "int8":
+            index = faiss.IndexScalarQuantizer(
+                dimension, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT
+            )
+            # Training only records per-dimension ranges; a sample is enough
+            index.train(embeddings[:10000])
+        else:
+            index = faiss.IndexFlatIP(dimension)
+        
+        index.add(embeddings)
+        return index
+    
+    def _search_index(self, index: Any, query: np.ndarray, limit: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the top matches (scores, positions) of a normalized query"""
+        if FAISS_AVAILABLE:
+            scores, indices = index.search(query.reshape(1, -1), min(limit, index.ntotal))
+            return scores[0], indices[0]
+        
+        similarities = index @ query
+        if limit < similarities.shape[0]:
+            # Select the top matches in linear time, then order only those
+            top_indices = np.argpartition(-similarities, limit)[:limit]
+        else:
+            top_indices = np.arange(similarities.shape[0])
+        top_indices = top_indices[np.argsort(-similarities[top_indices])]
+        return similarities[top_indices], top_indices
     
     async def _search_similar_file(self, query_embedding: np.ndarray, content_type: str, limit: int, video_id: Optional[int]) -> List[Dict]:
         """Fallback: Search embeddings from pickle files"""
         results = []
         
-        # This is a simplified implementation for file-based storage
-        # In production, you'd want a more sophisticated indexing system
+        query = _l2_normalize(np.array(query_embedding, dtype=np.float32).reshape(-1))
+        loop = asyncio.get_event_loop()
         
-        embedding_files = list(self.vector_db_path.glob("*_embeddings.pkl"))
+        # Embeddings are stored per video and content type, so only the
+        # matching files need to be searched
+        prefixes = []
+        if content_type in ["text", "both"]:
+            prefixes.append("text")
+        if content_type in ["frame", "visual", "both"]:
+            prefixes.append("frames")
+        video_pattern = str(video_id) if video_id else "*"
+        embedding_files = [
+            file_path
+            for prefix in prefixes
+            for file_path in self.vector_db_path.glob(f"{prefix}_{video_pattern}_embeddings.pkl")
+        ]
         
         for file_path in embedding_files:
             try:
-                with open(file_path, 'rb') as f:
-                    data = pickle.load(f)
-                
-                embeddings = data["embeddings"]
-                items = data["items"]
-                
-                # Calculate similarities
-                similarities = np.dot(embeddings, query_embedding.flatten())
+                items, index = await loop.run_in_executor(self.executor, self._load_file_index, file_path)
+                if index is None:
+                    continue
                 
-                # Get top results
-                top_indices = np.argsort(similarities)[::-1][:limit]
+                scores, indices = self._search_index(index, query, limit)
                 
-                for idx in top_indices:
-                    if similarities[idx] > 0.5:  # Similarity threshold
+                for score, idx in zip(scores, indices):
+                    if idx >= 0 and score > 0.5:  # Similarity threshold
                         result = items[idx].copy()
-                        result["similarity"] = float(similarities[idx])
+                        result["similarity"] = float(score)
                         results.append(result)
                         
             except Exception as e:
@@ -344,13 +632,58 @@ class EmbeddingEngine:
         results.sort(key=lambda x: x.get("similarity", 0), reverse=True)
         return results[:limit]
     
+    def _load_video_index(self) -> Tuple[np.ndarray, Any, np.ndarray]:
+        """Similarity index over the average embeddings of every embedded video"""
+        cached = self._video_index
+        if cached and cached[0] > time.monotonic():
+            return cached[1], cached[2], cached[3]
+        
+        db = SessionLocal()
+        try:
+            rows = db.query(Video.id, Video.avg_embedding).filter(Video.avg_embedding.isnot(None)).all()
+        finally:
+            db.close()
+        
+        video_ids = np.array([row.id for row in rows], dtype=np.int64)
+        embeddings = None
+        index = None
+        if rows:
+            embeddings = np.ascontiguousarray(
+                np.stack([np.frombuffer(row.avg_embedding, dtype=np.float32) for row in rows])
+            )
+            if FAISS_AVAILABLE:
+                index = faiss.IndexFlatIP(embeddings.shape[1])
+                index.add(embeddings)
+            else:
+                index = embeddings
+        
+        self._video_index = (time.monotonic() + self.video_index_ttl, video_ids, index, embeddings)
+        return video_ids, index, embeddings
+    
+    async def find_similar_videos(self, video_id: int, limit: int = 5) -> List[Dict]:
+        """Rank other videos by the similarity of their average transcript embeddings"""
+        loop = asyncio.get_event_loop()
+        video_ids, index, embeddings = await loop.run_in_executor(self.executor, self._load_video_index)
+        
+        positions = np.flatnonzero(video_ids == video_id)
+        if index is None or positions.size == 0:
+            return []
+        
+        # One extra match, since the video itself is always the closest
+        scores, indices = self._search_index(index, embeddings[positions[0]], limit + 1)
+        return [
+            {"video_id": int(video_ids[idx]), "similarity": float(score)}
+            for score, idx in zip(scores, indices)
+            if idx >= 0 and video_ids[idx] != video_id
+        ][:limit]
+    
     async def process_video_embeddings(self, video_id: int):
         """Process all embeddings for a video"""
         try:
             db = SessionLocal()
             
             # Get video data
-            video = db.query(Video).filter(Video.id == video_id).first()
+            video = db.get(Video, video_id)
             if not video:
                 raise ValueError(f"Video {video_id} not found")
             
@@ -358,7 +691,7 @@ class EmbeddingEngine:
             transcript_chunks = db.query(TranscriptChunk).filter(TranscriptChunk.video_id == video_id).all()
             if transcript_chunks:
                 texts = [chunk.text for chunk in transcript_chunks]
-                text_embeddings = await self.generate_text_embeddings(texts)
+                text_embeddings = await self.embed_chunks(texts)
                 
                 chunk_data = [
                     {
@@ -371,6 +704,12 @@ class EmbeddingEngine:
                 ]
                 
                 await self.store_text_embeddings(video_id, chunk_data, text_embeddings)
+                
+                # Keep the video's average embedding for video-to-video similarity
+                average = np.asarray(text_embeddings, dtype=np.float32).mean(axis=0)
+                video.avg_embedding = _l2_normalize(average).tobytes()
+                db.commit()
+                self._video_index = None
             
             # Process frame embeddings
             frames = db.query(VideoFrame).filter(VideoFrame.video_id == video_id).all()
@@ -401,13 +740,21 @@ class EmbeddingEngine:
 
 # Global embedding engine instance
 embedding_engine = None
+_embedding_engine_lock = asyncio.Lock()
 
 async def get_embedding_engine():
     """Get or create the global embedding engine instance"""
     global embedding_engine
     
-    if embedding_engine is None:
-        embedding_engine = EmbeddingEngine()
-        await embedding_engine.initialize()
+    if embedding_engine is not None:
+        return embedding_engine
+    
+    # Concurrent first callers wait for a single model load instead of each
+    # loading their own copy; the instance is only published once initialized
+    async with _embedding_engine_lock:
+        if embedding_engine is None:
+            engine = EmbeddingEngine()
+            await engine.initialize()
+            embedding_engine = engine
     
     return embedding_engine
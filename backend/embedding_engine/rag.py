@@ -3,8 +3,9 @@ Multimodal RAG System for Video Content Analysis
 Handles query processing, context retrieval, and response generation
 """
 
+import os
 import asyncio
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, AsyncIterator
 import logging
 from pathlib import Path
 import json
@@ -53,10 +54,13 @@ class MultimodalRAG:
             
             # Initialize language model
             if LANGCHAIN_AVAILABLE and self.openai_api_key:
+                # OPENAI_BASE_URL can point at an OpenAI-compatible server such as
+                # vLLM started with --enable-prefix-caching
                 self.chat_model = ChatOpenAI(
                     temperature=0.7,
-                    model_name="gpt-3.5-turbo",
-                    openai_api_key=self.openai_api_key
+                    model_name=os.getenv("OPENAI_MODEL", "gpt-3.5-turbo"),
+                    openai_api_key=self.openai_api_key,
+                    openai_api_base=os.getenv("OPENAI_BASE_URL") or None
                 )
                 self.logger.info("RAG system initialized with OpenAI")
             else:
@@ -85,13 +89,18 @@ Guidelines:
 - Provide frame numbers or timestamps for visual references
 - Keep responses informative but concise"""
 
+        # Ordered from most to least stable so consecutive turns of a session
+        # share the longest possible prompt prefix for provider-side caching
         self.query_prompt_template = PromptTemplate(
-            input_variables=["query", "context", "video_info"],
+            input_variables=["query", "context", "video_info", "history"],
             template="""Based on the following video content, answer the user's question.
 
 Video Information:
 {video_info}
 
+Conversation History:
+{history}
+
 Relevant Context:
 {context}
 
@@ -124,7 +133,9 @@ Summary:"""
                           query: str, 
                           video_ids: Optional[List[int]] = None,
                           search_type: str = "both",
-                          max_results: int = 10) -> Dict[str, Any]:
+                          max_results: int = 10,
+                          history: str = "",
+                          session_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Process a user query and generate a response
         
@@ -133,21 +144,15 @@ Summary:"""
             video_ids: Specific videos to search (None for all)
             search_type: "text", "visual", or "both"
             max_results: Maximum context items to retrieve
+            history: Recent conversation turns, placed ahead of the retrieved context
+            session_id: Chat session, sent to the LLM provider as a cache routing hint
         """
         try:
-            # Step 1: Generate query embedding
-            query_embedding = await self.embedding_engine.generate_text_embeddings([query])
-            
-            # Step 2: Retrieve relevant context
-            context_items = await self._retrieve_context(
-                query_embedding[0], 
-                video_ids, 
-                search_type, 
-                max_results
-            )
+            # Step 1 & 2: Embed the query and retrieve relevant context
+            context_items = await self.retrieve(query, video_ids, search_type, max_results, history)
             
             # Step 3: Generate response
-            response = await self._generate_response(query, context_items)
+            response = await self._generate_response(query, context_items, history, session_id)
             
             return {
                 "query": query,
@@ -167,6 +172,59 @@ Summary:"""
                 "search_type": search_type
             }
     
+    async def retrieve(self,
+                       query: str,
+                       video_ids: Optional[List[int]] = None,
+                       search_type: str = "both",
+                       max_results: int = 10,
+                       history: str = "") -> List[Dict]:
+        """Embed a query and retrieve its context without generating a response"""
+        if history:
+            query = f"Context: {history}\n\nUser Query: {query}"
+        query_embedding = await self.embedding_engine.embed_query(query)
+        return await self._retrieve_context(query_embedding, video_ids, search_type, max_results)
+    
+    def _build_messages(self, query: str, context_items: List[Dict], history: str) -> List:
+        """Assemble the chat prompt as [system][video info][history][context][query]"""
+        prompt = self.query_prompt_template.format(
+            query=query,
+            context=self._format_context(context_items),
+            video_info=self._extract_video_info(context_items),
+            history=history or "None"
+        )
+        
+        return [
+            SystemMessage(content=self.system_prompt),
+            HumanMessage(content=prompt)
+        ]
+    
+    @staticmethod
+    def _request_options(session_id: Optional[str]) -> Dict[str, Any]:
+        """Per-request LLM options; the session ID keeps a session's calls on the same cache"""
+        return {"user": session_id} if session_id else {}
+    
+    async def stream_response(self, query: str, context_items: List[Dict], history: str = "",
+                              session_id: Optional[str] = None) -> AsyncIterator[str]:
+        """Generate a response for retrieved context, yielding text chunks as they arrive"""
+        
+        if not self.chat_model:
+            yield self._generate_fallback_response(query, context_items)
+            return
+        
+        streamed = False
+        try:
+            messages = self._build_messages(query, context_items, history)
+            
+            async for chunk in self.chat_model.astream(messages, **self._request_options(session_id)):
+                if chunk.content:
+                    streamed = True
+                    yield chunk.content
+                    
+        except Exception as e:
+            self.logger.error(f"Error streaming response: {e}")
+            if not streamed:
+                yield self._generate_fallback_response(query, context_items)
+    
     async def _retrieve_context(self, 
                               query_embedding, 
                               video_ids: Optional[List[int]], 
@@ -174,93 +232,97 @@ Summary:"""
                               max_results: int) -> List[Dict]:
         """Retrieve relevant context from video content"""
         
-        all_context = []
-        
         # Search across all videos or specific ones
         if video_ids:
-            for video_id in video_ids:
-                context = await self.embedding_engine.search_similar_content(
-                    query_embedding, 
-                    content_type=search_type,
-                    limit=max_results // len(video_ids),
-                    video_id=video_id
-                )
-                all_context.extend(context)
+            # The per-video searches and the lookup of those videos' details
+            # are independent, so they run concurrently
+            per_video_limit = max(1, max_results // len(video_ids))
+            videos, *per_video_context = await asyncio.gather(
+                asyncio.to_thread(self._load_videos, set(video_ids)),
+                *[
+                    self.embedding_engine.search_similar_content(
+                        query_embedding,
+                        content_type=search_type,
+                        limit=per_video_limit,
+                        video_id=video_id
+                    )
+                    for video_id in video_ids
+                ]
+            )
+            all_context = [item for context in per_video_context for item in context]
         else:
             all_context = await self.embedding_engine.search_similar_content(
                 query_embedding,
                 content_type=search_type,
                 limit=max_results
             )
+            videos = await asyncio.to_thread(
+                self._load_videos, {item["video_id"] for item in all_context if item.get("video_id")}
+            )
         
         # Enrich context with database information
-        enriched_context = await self._enrich_context(all_context)
+        enriched_context = self._enrich_context(all_context, videos)
         
         # Sort by relevance
         enriched_context.sort(key=lambda x: x.get("similarity", 0), reverse=True)
         
         return enriched_context[:max_results]
     
-    async def _enrich_context(self, context_items: List[Dict]) -> List[Dict]:
-        """Enrich context items with additional database information"""
+    def _load_videos(self, video_ids: set) -> Dict[int, Any]:
+        """Load the details of every referenced video with a single IN query"""
+        if not video_ids:
+            return {}
         
         db = SessionLocal()
         try:
-            enriched = []
+            return {
+                video.id: video
+                for video in db.query(Video.id, Video.filename, Video.duration, Video.created_at)
+                .filter(Video.id.in_(video_ids))
+            }
+        finally:
+            db.close()
+    
+    def _enrich_context(self, context_items: List[Dict], videos: Dict[int, Any]) -> List[Dict]:
+        """Enrich context items with additional database information"""
+        enriched = []
+        
+        for item in context_items:
+            enriched_item = item.copy()
             
-            for item in context_items:
-                enriched_item = item.copy()
-                
-                # Get video information
-                video_id = item.get("video_id")
-                if video_id:
-                    video = db.query(Video).filter(Video.id == video_id).first()
-                    if video:
-                        enriched_item["video_filename"] = video.filename
-                        enriched_item["video_duration"] = video.duration
-                        enriched_item["video_created"] = str(video.created_at)
-                
-                # Add context type
-                if "text" in item:
-                    enriched_item["context_type"] = "transcript"
-                    enriched_item["content"] = item["text"]
-                elif "frame_path" in item:
-                    enriched_item["context_type"] = "frame"
-                    enriched_item["content"] = f"Frame at {item.get('timestamp', 0):.2f}s"
-                
-                enriched.append(enriched_item)
+            # Get video information
+            video_id = item.get("video_id")
+            if video_id:
+                video = videos.get(video_id)
+                if video:
+                    enriched_item["video_filename"] = video.filename
+                    enriched_item["video_duration"] = video.duration
+                    enriched_item["video_created"] = str(video.created_at)
             
-            return enriched
+            # Add context type
+            if "text" in item:
+                enriched_item["context_type"] = "transcript"
+                enriched_item["content"] = item["text"]
+            elif "frame_path" in item:
+                enriched_item["context_type"] = "frame"
+                enriched_item["content"] = f"Frame at {item.get('timestamp', 0):.2f}s"
             
-        finally:
-            db.close()
+            enriched.append(enriched_item)
+        
+        return enriched
     
-    async def _generate_response(self, query: str, context_items: List[Dict]) -> str:
+    async def _generate_response(self, query: str, context_items: List[Dict], history: str = "",
+                                 session_id: Optional[str] = None) -> str:
         """Generate response using retrieved context"""
         
         if not self.chat_model:
             return self._generate_fallback_response(query, context_items)
         
         try:
-            # Prepare context string
-            context_str = self._format_context(context_items)
-            
-            # Prepare video information
-            video_info = self._extract_video_info(context_items)
-            
             # Generate response using language model
-            prompt = self.query_prompt_template.format(
-                query=query,
-                context=context_str,
-                video_info=video_info
-            )
+            messages = self._build_messages(query, context_items, history)
             
-            messages = [
-                SystemMessage(content=self.system_prompt),
-                HumanMessage(content=prompt)
-            ]
-            
-            response = await self.chat_model.agenerate([messages])
+            response = await self.chat_model.agenerate([messages], **self._request_options(session_id))
             
             return response.generations[0][0].text.strip()
             
@@ -353,7 +415,7 @@ Summary:"""
             db = SessionLocal()
             
             # Get video information
-            video = db.query(Video).filter(Video.id == video_id).first()
+            video = db.get(Video, video_id)
             if not video:
                 raise ValueError(f"Video {video_id} not found")
             
@@ -385,8 +447,14 @@ Summary:"""
             content_str = "\n".join(content_parts)
             
             # Generate summary
+            summary_failed = False
             if self.chat_model:
-                summary = await self._generate_ai_summary(video.filename, content_str)
+                try:
+                    summary = await self._generate_ai_summary(video.filename, content_str)
+                except Exception as e:
+                    self.logger.error(f"Error generating AI summary: {e}")
+                    summary = f"AI summary generation failed: {str(e)}"
+                    summary_failed = True
             else:
                 summary = self._generate_basic_summary(video, transcripts, frames)
             
@@ -395,6 +463,7 @@ Summary:"""
                 "video_filename": video.filename,
                 "duration": video.duration,
                 "summary": summary,
+                "summary_failed": summary_failed,
                 "transcript_chunks": len(transcripts),
                 "frames_extracted": len(frames)
             }
@@ -406,25 +475,20 @@ Summary:"""
             db.close()
     
     async def _generate_ai_summary(self, video_title: str, content: str) -> str:
-        """Generate AI-powered summary"""
+        """Generate AI-powered summary; language model errors are raised to the caller"""
         
-        try:
-            prompt = self.summarization_prompt.format(
-                video_title=video_title,
-                content=content[:4000]  # Limit content length
-            )
-            
-            messages = [
-                SystemMessage(content=self.system_prompt),
-                HumanMessage(content=prompt)
-            ]
-            
-            response = await self.chat_model.agenerate([messages])
-            return response.generations[0][0].text.strip()
-            
-        except Exception as e:
-            self.logger.error(f"Error generating AI summary: {e}")
-            return f"AI summary generation failed: {str(e)}"
+        prompt = self.summarization_prompt.format(
+            video_title=video_title,
+            content=content[:4000]  # Limit content length
+        )
+        
+        messages = [
+            SystemMessage(content=self.system_prompt),
+            HumanMessage(content=prompt)
+        ]
+        
+        response = await self.chat_model.agenerate([messages])
+        return response.generations[0][0].text.strip()
     
     def _generate_basic_summary(self, video: Video, transcripts: List, frames: List) -> str:
         """Generate basic summary without AI"""
@@ -472,13 +536,21 @@ Summary:"""
 
 # Global RAG instance
 rag_system = None
+_rag_system_lock = asyncio.Lock()
 
 async def get_rag_system(openai_api_key: Optional[str] = None):
     """Get or create the global RAG system instance"""
     global rag_system
     
-    if rag_system is None:
-        rag_system = MultimodalRAG(openai_api_key)
-        await rag_system.initialize()
+    if rag_system is not None:
+        return rag_system
+    
+    # Concurrent first callers share one initialization; the instance is only
+    # published once it is ready
+    async with _rag_system_lock:
+        if rag_system is None:
+            system = MultimodalRAG(openai_api_key)
+            await system.initialize()
+            rag_system = system
     
     return rag_system
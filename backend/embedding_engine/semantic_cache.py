@@ -0,0 +1,91 @@
+"""
+Semantic Response Cache for MultiModel Video Processor
+Reuses generated answers for queries that are near-duplicates of earlier ones
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+
+class SemanticCache:
+    """
+    LRU + TTL cache of responses keyed by query embedding.
+
+    Entries are grouped by scope, a tuple of the video IDs the response was
+    generated from (optionally alongside non-integer settings), so a lookup
+    only matches answers about the same videos and a video's entries can be
+    dropped when its content changes. A scope with no video IDs covers every
+    video.
+
+    The cache lives in one worker process: invalidate_video only clears that
+    worker's entries, so the TTL bounds how long other workers may serve an
+    answer built before a video was reprocessed.
+    """
+
+    def __init__(self,
+                 similarity_threshold: float = 0.95,
+                 max_entries_per_scope: int = 256,
+                 max_scopes: int = 1024,
+                 ttl_seconds: float = 3600):
+        self.similarity_threshold = similarity_threshold
+        self.max_entries_per_scope = max_entries_per_scope
+        self.max_scopes = max_scopes
+        self.ttl_seconds = ttl_seconds
+
+        # scope -> entry id -> (normalized embedding, expiry time, value), with
+        # the least recently used scope first
+        self._scopes: "OrderedDict[Tuple, OrderedDict[int, Tuple[np.ndarray, float, Any]]]" = OrderedDict()
+        self._next_id = 0
+
+    @staticmethod
+    def _normalize(embedding: np.ndarray) -> np.ndarray:
+        vector = np.array(embedding, dtype=np.float32).reshape(-1)
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+    def lookup(self, scope: Tuple, embedding: np.ndarray) -> Optional[Any]:
+        """Return the cached value of the most similar query in scope, if close enough"""
+        entries = self._scopes.get(scope)
+        if not entries:
+            return None
+
+        now = time.monotonic()
+        for entry_id in [entry_id for entry_id, entry in entries.items() if entry[1] <= now]:
+            del entries[entry_id]
+        if not entries:
+            del self._scopes[scope]
+            return None
+
+        entry_ids = list(entries.keys())
+        matrix = np.stack([entries[entry_id][0] for entry_id in entry_ids])
+        scores = matrix @ self._normalize(embedding)
+        best = int(np.argmax(scores))
+
+        if scores[best] < self.similarity_threshold:
+            return None
+
+        entries.move_to_end(entry_ids[best])
+        self._scopes.move_to_end(scope)
+        return entries[entry_ids[best]][2]
+
+    def store(self, scope: Tuple, embedding: np.ndarray, value: Any):
+        """Cache a value for a query embedding, evicting the least recently used entry if full"""
+        entries = self._scopes.setdefault(scope, OrderedDict())
+        self._scopes.move_to_end(scope)
+        entries[self._next_id] = (self._normalize(embedding), time.monotonic() + self.ttl_seconds, value)
+        self._next_id += 1
+
+        while len(entries) > self.max_entries_per_scope:
+            entries.popitem(last=False)
+
+        # Scopes are built from request parameters, so their number is capped too
+        while len(self._scopes) > self.max_scopes:
+            self._scopes.popitem(last=False)
+
+    def invalidate_video(self, video_id: int):
+        """Drop every cached response that may have been generated from a video"""
+        for scope in [scope for scope in self._scopes
+                      if video_id in scope or not any(isinstance(member, int) for member in scope)]:
+            del self._scopes[scope]
@@ -5,6 +5,7 @@ from typing import List, Dict, Optional, Tuple
 import logging
 import re
 import os
+from functools import lru_cache
 from pathlib import Path
 
 # Add OpenAI import
@@ -16,6 +17,21 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Tried in order; the first match wins
+YOUTUBE_VIDEO_ID_PATTERNS = [
+    re.compile(r'(?:youtube\.com/watch\?v=|youtu\.be/|youtube\.com/embed/)([^&\n?#]+)'),
+    re.compile(r'youtube\.com/watch\?.*v=([^&\n?#]+)')
+]
+
+
+@lru_cache(maxsize=4096)
+def _extract_youtube_video_id(url: str) -> Optional[str]:
+    for pattern in YOUTUBE_VIDEO_ID_PATTERNS:
+        match = pattern.search(url)
+        if match:
+            return match.group(1)
+    return None
+
 
 class TranscriptHandler:
     def __init__(self):
@@ -51,16 +67,7 @@ class TranscriptHandler:
 
     def extract_youtube_video_id(self, url: str) -> Optional[str]:
         """Extract video ID from YouTube URL"""
-        patterns = [
-            r'(?:youtube\.com/watch\?v=|youtu\.be/|youtube\.com/embed/)([^&\n?#]+)',
-            r'youtube\.com/watch\?.*v=([^&\n?#]+)'
-        ]
-
-        for pattern in patterns:
-            match = re.search(pattern, url)
-            if match:
-                return match.group(1)
-        return None
+        return _extract_youtube_video_id(url)
 
     def get_youtube_transcript(
         self, video_url: str) -> Tuple[List[Dict], Dict]:
@@ -299,36 +306,49 @@ class TranscriptHandler:
                 "confidence": 0.0
             }
             
+            # Collect segment texts and track the joined length instead of
+            # re-concatenating the chunk text for every segment
+            text_parts = []
+            text_length = 0
             confidence_sum = 0.0
             segment_count = 0
             
             for segment in transcript_chunks:
+                segment_text = segment["text"]
                 # Check if adding this segment would exceed max size
-                potential_text = current_chunk["text"] + " " + segment["text"] if current_chunk["text"] else segment["text"]
+                potential_length = text_length + 1 + len(segment_text) if text_length else len(segment_text)
                 
-                if len(potential_text) > max_chunk_size and current_chunk["text"]:
+                if potential_length > max_chunk_size and text_length:
                     # Finalize current chunk
+                    current_chunk["text"] = " ".join(text_parts)
                     current_chunk["confidence"] = confidence_sum / segment_count if segment_count > 0 else 0.0
-                    intelligent_chunks.append(current_chunk.copy())
+                    intelligent_chunks.append(current_chunk)
                     
                     # Start new chunk
                     current_chunk = {
-                        "text": segment["text"],
+                        "text": "",
                         "start_time": segment["start_time"],
                         "end_time": segment["end_time"],
                         "confidence": segment["confidence"]
                     }
+                    text_parts = [segment_text]
+                    text_length = len(segment_text)
                     confidence_sum = segment["confidence"]
                     segment_count = 1
                 else:
                     # Add to current chunk
-                    current_chunk["text"] = potential_text
+                    if text_length:
+                        text_parts.append(segment_text)
+                    else:
+                        text_parts = [segment_text]
+                    text_length = potential_length
                     current_chunk["end_time"] = segment["end_time"]
                     confidence_sum += segment["confidence"]
                     segment_count += 1
             
             # Add final chunk
-            if current_chunk["text"]:
+            if text_length:
+                current_chunk["text"] = " ".join(text_parts)
                 current_chunk["confidence"] = confidence_sum / segment_count if segment_count > 0 else 0.0
                 intelligent_chunks.append(current_chunk)
             
@@ -1,5 +1,6 @@
 import cv2
 import os
+import shutil
 import uuid
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
@@ -56,8 +57,12 @@ class VideoProcessor:
             logger.error(f"Error extracting metadata from {video_path}: {str(e)}")
             raise
     
-    def extract_frames(self, video_path: str, video_id: int, fps: float = 1.0) -> List[Dict]:
-        """Extract frames from video at specified fps"""
+    def extract_frames(self, video_path: str, video_id: int, fps: float = 1.0) -> List[Tuple]:
+        """
+        Extract frames from video at specified fps.
+        Returns (frame_path, timestamp, frame_number, width, height) tuples,
+        which are cheap to pickle back from a worker process.
+        """
         try:
             cap = cv2.VideoCapture(video_path)
             
@@ -93,13 +98,13 @@ class VideoProcessor:
                     pil_image = Image.fromarray(frame_rgb)
                     pil_image.save(frame_path, "JPEG", quality=85)
                     
-                    frames_data.append({
-                        "frame_path": str(frame_path),
-                        "timestamp": timestamp,
-                        "frame_number": frame_number,
-                        "width": frame.shape[1],
-                        "height": frame.shape[0]
-                    })
+                    frames_data.append((
+                        str(frame_path),
+                        timestamp,
+                        frame_number,
+                        frame.shape[1],
+                        frame.shape[0]
+                    ))
                     
                     extracted_count += 1
                 
@@ -114,20 +119,30 @@ class VideoProcessor:
             logger.error(f"Error extracting frames from {video_path}: {str(e)}")
             raise
     
-    def process_uploaded_file(self, file_path: str, original_filename: str) -> Tuple[str, Dict]:
-        """Process uploaded video file"""
+    def staging_path(self, original_filename: str) -> Path:
+        """
+        Path to write an incoming upload to. It lives in the processed
+        directory so process_uploaded_file can rename it into place
+        """
+        return self.processed_dir / f".upload_{uuid.uuid4()}{Path(original_filename).suffix}"
+    
+    def process_uploaded_file(self, file_path: str, original_filename: str,
+                              metadata: Optional[Dict] = None) -> Tuple[str, Dict]:
+        """Process uploaded video file, reusing metadata already probed from it if given"""
         try:
             # Generate unique filename
             file_extension = Path(original_filename).suffix
             unique_filename = f"{uuid.uuid4()}{file_extension}"
             processed_path = self.processed_dir / unique_filename
             
-            # Copy file to processed directory (in production, you might want to move or link)
-            import shutil
-            shutil.copy2(file_path, processed_path)
+            # Move the staged upload into the processed directory. This is a
+            # rename on the same filesystem, so no bytes are copied; across
+            # filesystems shutil falls back to a sendfile-based copy
+            shutil.move(file_path, processed_path)
             
             # Extract metadata
-            metadata = self.get_video_metadata(str(processed_path))
+            if metadata is None:
+                metadata = self.get_video_metadata(str(processed_path))
             
             return str(processed_path), metadata
             
@@ -135,6 +150,23 @@ class VideoProcessor:
             logger.error(f"Error processing uploaded file {original_filename}: {str(e)}")
             raise
     
+    def get_validated_metadata(self, file_path: str, max_size_mb: int = 500) -> Optional[Dict]:
+        """Validate video file size and format, returning its metadata or None if invalid"""
+        try:
+            file_size = os.path.getsize(file_path)
+            max_size_bytes = max_size_mb * 1024 * 1024
+            
+            if file_size > max_size_bytes:
+                logger.warning(f"File too large: {file_size} bytes > {max_size_bytes} bytes")
+                return None
+            
+            # Opening the file for metadata doubles as the format check
+            return self.get_video_metadata(file_path)
+            
+        except Exception as e:
+            logger.error(f"Error validating video file {file_path}: {str(e)}")
+            return None
+    
     def validate_video_file(self, file_path: str, max_size_mb: int = 500) -> bool:
         """Validate video file format and size"""
         try:
@@ -7,8 +7,12 @@ from datetime import datetime
 from sqlalchemy.orm import Session
 from backend.database.models import Video, VideoFrame, ObjectDetection, SceneClassification
 import json
+import os
 import re
+import threading
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from cachetools import LRUCache
 
 class VisualSearchEngine:
     """
@@ -19,6 +23,16 @@ class VisualSearchEngine:
     def __init__(self):
         self.object_detector = None
         self.scene_classifier = None
+        # Frame decoding and inference release the GIL, so frames are analyzed in parallel
+        self.executor = ThreadPoolExecutor(max_workers=4)
+        # Decoded frames for the per-frame endpoints, which tend to hit the same
+        # frames repeatedly; bounded by total pixel bytes and keyed by mtime so a
+        # rewritten frame is decoded again
+        self._frame_cache = LRUCache(
+            maxsize=int(os.getenv("FRAME_CACHE_MB", "256")) * 1024 * 1024,
+            getsizeof=lambda frame: frame.nbytes
+        )
+        self._frame_cache_lock = threading.Lock()
         self.setup_models()
     
     def setup_models(self):
@@ -37,6 +51,29 @@ class VisualSearchEngine:
         except Exception as e:
             print(f"⚠️ Warning: Could not load all visual models: {e}")
     
+    def _read_frame(self, frame_path: str) -> Optional[np.ndarray]:
+        """Decode a frame image, reusing a cached copy while the file is unchanged."""
+        try:
+            key = (frame_path, os.stat(frame_path).st_mtime_ns)
+        except OSError:
+            return None
+        
+        with self._frame_cache_lock:
+            frame = self._frame_cache.get(key)
+        if frame is not None:
+            return frame
+        
+        frame = cv2.imread(frame_path)
+        if frame is None:
+            return None
+        
+        # Shared between callers, so it must not be modified in place
+        frame.flags.writeable = False
+        if frame.nbytes <= self._frame_cache.maxsize:
+            with self._frame_cache_lock:
+                self._frame_cache[key] = frame
+        return frame
+    
     def detect_objects_in_frame(self, frame_path: str, confidence_threshold: float = 0.5) -> List[Dict]:
         """
         Detect objects in a single frame.
@@ -44,7 +81,7 @@ class VisualSearchEngine:
         """
         try:
             # Load the frame
-            frame = cv2.imread(frame_path)
+            frame = self._read_frame(frame_path)
             if frame is None:
                 return []
             
@@ -96,7 +133,7 @@ class VisualSearchEngine:
         Returns scene type with confidence and description.
         """
         try:
-            frame = cv2.imread(frame_path)
+            frame = self._read_frame(frame_path)
             if frame is None:
                 return {}
             
@@ -142,12 +179,26 @@ class VisualSearchEngine:
             }
         }
     
+    def _analyze_frame(self, frame_path: str, confidence_threshold: float) -> Tuple[List[Dict], Dict[str, Any]]:
+        """Detect objects in and classify the scene of a frame, decoding the image once."""
+        try:
+            frame = cv2.imread(frame_path)
+            if frame is None:
+                return [], {}
+            
+            return (self._simulate_object_detection(frame, confidence_threshold),
+                    self._simulate_scene_classification(frame))
+            
+        except Exception as e:
+            print(f"Error analyzing frame {frame_path}: {e}")
+            return [], {}
+    
     def process_video_frames(self, db: Session, video_id: int, 
                            confidence_threshold: float = 0.5) -> Dict[str, int]:
         """
         Process all frames of a video for object detection and scene classification.
         """
-        video = db.query(Video).filter(Video.id == video_id).first()
+        video = db.get(Video, video_id)
         if not video:
             raise ValueError(f"Video {video_id} not found")
         
@@ -159,50 +210,62 @@ class VisualSearchEngine:
             'frames_processed': 0
         }
         
-        for frame in frames:
+        # Analyze frames on the pool; results come back in frame order
+        analyses = self.executor.map(
+            lambda frame_path: self._analyze_frame(frame_path, confidence_threshold),
+            [frame.frame_path for frame in frames]
+        )
+        
+        # Rows are collected and written with one multi-row INSERT per table
+        object_rows = []
+        scene_rows = []
+        
+        for frame, (detected_objects, scene_info) in zip(frames, analyses):
             try:
-                # Detect objects in frame
-                detected_objects = self.detect_objects_in_frame(
-                    frame.frame_path, confidence_threshold
-                )
-                
                 # Store object detections
-                for obj in detected_objects:
-                    object_detection = ObjectDetection(
-                        video_id=video_id,
-                        frame_id=frame.id,
-                        object_class=obj['class'],
-                        confidence=obj['confidence'],
-                        bbox_x=obj['bbox'][0],
-                        bbox_y=obj['bbox'][1],
-                        bbox_width=obj['bbox'][2],
-                        bbox_height=obj['bbox'][3],
-                        attributes=obj.get('attributes', {})
-                    )
-                    db.add(object_detection)
-                    processed_count['objects_detected'] += 1
+                frame_objects = [
+                    {
+                        'video_id': video_id,
+                        'frame_id': frame.id,
+                        'object_class': obj['class'],
+                        'confidence': obj['confidence'],
+                        'bbox_x': obj['bbox'][0],
+                        'bbox_y': obj['bbox'][1],
+                        'bbox_width': obj['bbox'][2],
+                        'bbox_height': obj['bbox'][3],
+                        'attributes': obj.get('attributes', {})
+                    }
+                    for obj in detected_objects
+                ]
                 
-                # Classify scene
-                scene_info = self.classify_scene(frame.frame_path)
+                # Store scene classification
+                frame_scene = None
                 if scene_info:
-                    scene_classification = SceneClassification(
-                        video_id=video_id,
-                        start_time=frame.timestamp,
-                        end_time=frame.timestamp + 1.0,  # Assume 1-second duration
-                        scene_type=scene_info['scene_type'],
-                        confidence=scene_info['confidence'],
-                        description=scene_info.get('description'),
-                        features=scene_info.get('features', {})
-                    )
-                    db.add(scene_classification)
-                    processed_count['scenes_classified'] += 1
-                
-                processed_count['frames_processed'] += 1
+                    frame_scene = {
+                        'video_id': video_id,
+                        'start_time': frame.timestamp,
+                        'end_time': frame.timestamp + 1.0,  # Assume 1-second duration
+                        'scene_type': scene_info['scene_type'],
+                        'confidence': scene_info['confidence'],
+                        'description': scene_info.get('description'),
+                        'features': scene_info.get('features', {})
+                    }
                 
             except Exception as e:
                 print(f"Error processing frame {frame.id}: {e}")
                 continue
+            
+            object_rows.extend(frame_objects)
+            processed_count['objects_detected'] += len(frame_objects)
+            if frame_scene:
+                scene_rows.append(frame_scene)
+                processed_count['scenes_classified'] += 1
+            processed_count['frames_processed'] += 1
         
+        if object_rows:
+            db.bulk_insert_mappings(ObjectDetection, object_rows)
+        if scene_rows:
+            db.bulk_insert_mappings(SceneClassification, scene_rows)
         db.commit()
         return processed_count
     
@@ -255,7 +318,10 @@ class VisualSearchEngine:
         # Build database query for objects
         object_results = []
         if parsed_query['objects'] or parsed_query['colors']:
-            object_query = db.query(ObjectDetection).filter(
+            # Load each detection together with its frame in a single query
+            object_query = db.query(ObjectDetection, VideoFrame).outerjoin(
+                VideoFrame, VideoFrame.id == ObjectDetection.frame_id
+            ).filter(
                 ObjectDetection.video_id == video_id,
                 ObjectDetection.confidence >= confidence_threshold
             )
@@ -268,7 +334,7 @@ class VisualSearchEngine:
             
             objects = object_query.all()
             
-            for obj in objects:
+            for obj, frame in objects:
                 # Check color attributes if specified
                 if parsed_query['colors']:
                     obj_attributes = obj.attributes or {}
@@ -278,9 +344,6 @@ class VisualSearchEngine:
                     if not any(color in obj_colors for color in parsed_query['colors']):
                         continue
                 
-                # Get frame info
-                frame = db.query(VideoFrame).filter(VideoFrame.id == obj.frame_id).first()
-                
                 object_results.append({
                     'type': 'object',
                     'object_class': obj.object_class,
@@ -348,7 +411,7 @@ class VisualSearchEngine:
         
         # Add object detections
         for obj in objects:
-            frame = db.query(VideoFrame).filter(VideoFrame.id == obj.frame_id).first()
+            frame = db.get(VideoFrame, obj.frame_id)
             if frame:
                 timeline_events.append({
                     'timestamp': frame.timestamp,